@@ -0,0 +1,70 @@
+"""
+Generator of synthetic vacancies shaped like hh.ru /vacancies search items.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+
+TITLES = ("Python-разработчик", "Программист 1С", "Backend-разработчик", "Frontend-разработчик",
+          "Data Engineer", "QA-инженер", "DevOps-инженер", "Аналитик данных", "Java-разработчик",
+          "Ведущий программист", "Системный программист", "Team Lead")
+CITIES = ("Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань", "Алматы")
+STREETS = ("Ленина", "Тверская", "Невский проспект", "Мира", "Садовая")
+CURRENCIES = (("RUR", 0.85), ("USD", 0.08), ("KZT", 0.05), ("EUR", 0.02))
+SKILLS = ("Python", "SQL", "PostgreSQL", "Django", "Docker", "Kubernetes", "Git", "Linux", "1С", "Java",
+          "REST API", "Kafka", "Redis", "React", "TypeScript")
+# Vacancies are published within the last days crawled by CrawlPlanner, which searches back from the real clock.
+PERIOD_DAYS = 29
+
+
+def _snippet(rng: random.Random) -> dict[str, Any]:
+    skills = rng.sample(SKILLS, 3)
+    return {
+        "requirement": f"Опыт работы с <highlighttext>{skills[0]}</highlighttext> от {rng.randint(1, 5)} лет. "
+                       f"Знание {skills[1]} &amp; {skills[2]}.",
+        "responsibility": f"Разработка и поддержка сервисов на <highlighttext>{skills[0]}</highlighttext>. "
+                          f"Участие в код-ревью &quot;{skills[1]}&quot;.",
+    }
+
+
+def _salary(rng: random.Random) -> dict[str, Any] | None:
+    if rng.random() < 0.4:
+        return None
+    currency = rng.choices([code for code, _ in CURRENCIES], weights=[weight for _, weight in CURRENCIES])[0]
+    scale = {"RUR": 1, "USD": 0.011, "EUR": 0.01, "KZT": 5}[currency]
+    bottom = int(rng.randint(40, 300) * 1000 * scale) if rng.random() < 0.8 else None
+    top = int((bottom or 60000 * scale) * rng.uniform(1.1, 1.8)) if rng.random() < 0.7 else None
+    return {"from": bottom, "to": top, "currency": currency, "gross": rng.random() < 0.5}
+
+
+def generate_vacancies(count: int, employers: int = 500, seed: int = 0,
+                       now: datetime = None) -> Iterator[dict[str, Any]]:
+    """Yields count realistic vacancies spread over given number of employers, published before now."""
+    rng = random.Random(seed)
+    now = now or datetime.now().replace(microsecond=0)
+    for index in range(count):
+        vacancy_id = 90_000_000 + index
+        employer_id = rng.randint(1, employers)
+        published = now - timedelta(seconds=rng.randint(0, PERIOD_DAYS * 24 * 3600))
+        yield {
+            "id": str(vacancy_id),
+            "name": rng.choice(TITLES),
+            "alternate_url": f"https://hh.ru/vacancy/{vacancy_id}",
+            "published_at": published.strftime("%Y-%m-%dT%H:%M:%S+0300"),
+            "salary": _salary(rng),
+            "address": {"city": rng.choice(CITIES), "street": rng.choice(STREETS),
+                        "building": str(rng.randint(1, 200))} if rng.random() < 0.6 else None,
+            "employer": {"id": str(employer_id), "name": f"Компания {employer_id}",
+                         "alternate_url": f"https://hh.ru/employer/{employer_id}"},
+            "snippet": _snippet(rng),
+        }
+
+
+def write_ndjson(path: str, count: int, employers: int = 500, seed: int = 0):
+    """Writes generated vacancies to NDJSON file."""
+    with open(path, "w", encoding="utf-8") as file:
+        for vacancy in generate_vacancies(count, employers, seed):
+            file.write(json.dumps(vacancy, ensure_ascii=False))
+            file.write("\n")
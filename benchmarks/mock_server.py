@@ -0,0 +1,128 @@
+"""
+Local stand-in for hh.ru /vacancies search and /vacancies/{id}, /employers/{id} details
+with pagination, latency and error injection.
+"""
+
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+MAX_RESULTS = 2000
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value[:19])
+
+
+class MockHHServer:
+    """HTTP server serving given vacancies like hh.ru search; use as a context manager."""
+
+    def __init__(self, vacancies: list[dict[str, Any]], latency: float = 0.0, error_rate: float = 0.0,
+                 seed: int = 0):
+        self.vacancies = vacancies
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._by_employer = defaultdict(list)
+        self._by_id = {}
+        for vacancy in vacancies:
+            self._by_employer[vacancy["employer"]["id"]].append(vacancy)
+            self._by_id[vacancy["id"]] = vacancy
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/vacancies"
+
+    def __enter__(self) -> "MockHHServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _search(self, query: dict[str, list[str]]) -> tuple[int, dict[str, Any]]:
+        employers = query.get("employer_id")
+        found = ([vacancy for employer in employers for vacancy in self._by_employer.get(employer, [])]
+                 if employers else self.vacancies)
+        if "date_from" in query:
+            date_from = _parse_date(query["date_from"][0])
+            found = [vacancy for vacancy in found if _parse_date(vacancy["published_at"]) >= date_from]
+        if "date_to" in query:
+            date_to = _parse_date(query["date_to"][0])
+            found = [vacancy for vacancy in found if _parse_date(vacancy["published_at"]) < date_to]
+        per_page = int(query.get("per_page", ["20"])[0])
+        page = int(query.get("page", ["0"])[0])
+        if (page + 1) * per_page > MAX_RESULTS:
+            return 400, {"errors": [{"type": "bad_argument", "value": "page"}]}
+        return 200, {"items": found[page * per_page:(page + 1) * per_page],
+                     "found": len(found),
+                     "pages": min(math.ceil(len(found) / per_page), MAX_RESULTS // per_page),
+                     "page": page,
+                     "per_page": per_page}
+
+    def _details(self, path: str) -> tuple[int, dict[str, Any]]:
+        kind, _, record_id = path.strip("/").partition("/")
+        if kind == "vacancies" and record_id in self._by_id:
+            vacancy = self._by_id[record_id]
+            snippet = vacancy["snippet"]
+            return 200, {**vacancy, "description": f"<p>{snippet['responsibility']}</p>"
+                                                   f"<p>{snippet['requirement']}</p>"}
+        employer = self._by_employer.get(record_id)
+        if kind == "employers" and employer:
+            city = (employer[0]["address"] or {}).get("city", "Москва")
+            return 200, {**employer[0]["employer"], "area": {"name": city},
+                         "site_url": f"https://company{record_id}.example.com",
+                         "description": f"<p>{employer[0]['employer']['name']} - IT-компания</p>"}
+        return 404, {"errors": [{"type": "not_found"}]}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b"", headers: dict[str, str] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    fail = server._random.random() < server.error_rate
+                if server.latency:
+                    time.sleep(server.latency)
+                parsed = urlparse(self.path)
+                if not parsed.path.startswith(("/vacancies", "/employers/")):
+                    return self._send(404)
+                if fail:
+                    return self._send(503, headers={"Retry-After": "0"})
+                if parsed.path == "/vacancies":
+                    status, payload = server._search(parse_qs(parsed.query))
+                else:
+                    status, payload = server._details(parsed.path)
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    return self._send(304, headers={"ETag": etag})
+                self._send(status, body, {"Content-Type": "application/json; charset=utf-8", "ETag": etag})
+
+        return Handler
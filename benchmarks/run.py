@@ -0,0 +1,162 @@
+"""
+Benchmarks of fetch, parse, load and query stages.
+
+Usage:
+    python -m benchmarks.run --scale 10000
+    python -m benchmarks.run --scale 100000 --config database.ini --compare benchmarks/results/<previous>.json
+
+Database benchmarks run only with --config and use a separate database (vacancies_benchmark by default).
+Results are saved to benchmarks/results/ for regression comparison.
+"""
+
+import argparse
+import json
+import os
+import platform
+import time
+from datetime import datetime
+from typing import Any, Callable
+from benchmarks.datagen import generate_vacancies
+from benchmarks.mock_server import MockHHServer
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(__file__), "results")
+PAGE_SIZE = 100
+
+
+def measure(function: Callable[[], int], repeat: int, setup: Callable[[], Any] = None) -> dict[str, float]:
+    """Runs function repeat times and returns best time with number of processed items per second."""
+    best, items = float("inf"), 0
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        started_at = time.perf_counter()
+        items = function(argument) if setup else function()
+        best = min(best, time.perf_counter() - started_at)
+    return {"seconds": round(best, 4), "items": items, "rate": round(items / best, 1) if best else 0.0}
+
+
+def _pages(count: int, employers: int) -> list[list[dict]]:
+    vacancies = list(generate_vacancies(count, employers))
+    return [vacancies[start:start + PAGE_SIZE] for start in range(0, len(vacancies), PAGE_SIZE)]
+
+
+def bench_parse(scale: int, employers: int, repeat: int, workers: int) -> dict[str, dict]:
+    from src.salary import SalaryNormalizer
+    from src.vacancy import Vacancy
+
+    normalizer = SalaryNormalizer({"RUR": 1.0, "USD": 90.0, "EUR": 98.0, "KZT": 0.19})
+    vacancy = Vacancy(normalizer)
+
+    def parse(pages):
+        return sum(len(vacancy.create_vacancy(page)) for page in pages)
+
+    results = {"parse.create_vacancy": measure(parse, repeat, setup=lambda: _pages(scale, employers))}
+    if workers > 1:
+        with Vacancy(normalizer, workers=workers, min_parallel_items=0) as parallel:
+            parallel.create_vacancy(_pages(PAGE_SIZE * workers, employers)[0])
+            results[f"parse.iter_vacancies.workers_{workers}"] = measure(
+                lambda pages: sum(len(records) for records in parallel.iter_vacancies(pages)),
+                repeat, setup=lambda: _pages(scale, employers))
+    return results
+
+
+def bench_fetch(scale: int, employers: int, repeat: int, latency: float, error_rate: float,
+                concurrency: int) -> dict[str, dict]:
+    from src.crawler import CrawlPlanner
+    from src.parser import HHApiConnector
+    from src.resilience import RetryPolicy, TokenBucket
+
+    results = {}
+    vacancies = list(generate_vacancies(scale, employers))
+    employer_ids = sorted({vacancy["employer"]["id"] for vacancy in vacancies}, key=int)
+    with MockHHServer(vacancies, latency=latency, error_rate=error_rate) as server:
+        for workers in sorted({1, concurrency}):
+            def fetch():
+                connector = HHApiConnector(concurrency=workers, employers_id=employer_ids, url=server.url,
+                                           rate_limiter=TokenBucket(rate=1e9, capacity=10 ** 9),
+                                           retry_policy=RetryPolicy(base_delay=0.01))
+                planner = CrawlPlanner(connector, shard_concurrency=workers)
+                return sum(len(items) for items in planner.iter_pages())
+
+            results[f"fetch.crawl_planner.concurrency_{workers}"] = measure(fetch, repeat)
+        results["fetch.mock_requests"] = {"seconds": 0.0, "items": server.requests, "rate": 0.0}
+    return results
+
+
+def bench_database(scale: int, employers: int, repeat: int, config_file: str, database: str) -> dict[str, dict]:
+    from config import config
+    from src.connection import ConnectionPool
+    from src.databasemanager import DataBaseConnector, DataBaseManager
+    from src.salary import SalaryNormalizer
+    from src.vacancy import Vacancy
+
+    params = config(config_file)
+    vacancy = Vacancy(SalaryNormalizer({"RUR": 1.0, "USD": 90.0, "EUR": 98.0, "KZT": 0.19}))
+    DataBaseConnector.create_database(database, params)
+    results = {"load.load_stream": measure(
+        lambda pages: DataBaseConnector.load_stream(vacancy.iter_vacancies(pages), database, params),
+        repeat, setup=lambda: _pages(scale, employers))}
+    db_manager = DataBaseManager(database, params)
+    queries = {"get_companies_and_vacancies_count": {},
+               "get_all_vacancies": {},
+               "get_avg_salary": {},
+               "get_vacancies_with_higher_salary": {},
+               "get_vacancies_with_keyword": {"keyword": "Python"},
+               "get_salary_stats": {}}
+    for name, arguments in queries.items():
+        def run_query():
+            with db_manager.cursor() as cursor:
+                return sum(1 for _ in getattr(db_manager, name)(cursor, **arguments))
+
+        results[f"query.{name}"] = measure(run_query, repeat)
+    ConnectionPool.close_all()
+    return results
+
+
+def compare(current: dict[str, dict], previous_path: str):
+    """Prints change of timings against previously saved results."""
+    with open(previous_path, encoding="utf-8") as file:
+        previous = json.load(file)["results"]
+    for name, result in current.items():
+        before = previous.get(name)
+        if before and before["seconds"]:
+            change = (result["seconds"] - before["seconds"]) / before["seconds"] * 100
+            print(f"{name:55} {before['seconds']:>10.4f} -> {result['seconds']:>10.4f} s ({change:+.1f}%)")
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmarks of HHParser stages.")
+    parser.add_argument("--scale", type=int, default=10_000, help="number of generated vacancies")
+    parser.add_argument("--employers", type=int, default=500, help="number of generated employers")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, best time is reported")
+    parser.add_argument("--latency", type=float, default=0.02, help="mock server latency per request, s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of mock requests failing with 503")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrency of the fetch benchmark")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1,
+                        help="processes of the parallel parse benchmark")
+    parser.add_argument("--skip-fetch", action="store_true", help="skip the fetch benchmark")
+    parser.add_argument("--config", help="database config file; enables load and query benchmarks")
+    parser.add_argument("--database", default="vacancies_benchmark", help="benchmark database name")
+    parser.add_argument("--compare", help="previous results file to compare with")
+    args = parser.parse_args(argv)
+
+    results = bench_parse(args.scale, args.employers, args.repeat, args.parse_workers)
+    if not args.skip_fetch:
+        results.update(bench_fetch(args.scale, args.employers, args.repeat, args.latency, args.error_rate,
+                                   args.concurrency))
+    if args.config:
+        results.update(bench_database(args.scale, args.employers, args.repeat, args.config, args.database))
+
+    for name, result in results.items():
+        print(f"{name:55} {result['seconds']:>10.4f} s {result['items']:>10} items {result['rate']:>12.1f} /s")
+    os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+    path = os.path.join(RESULTS_DIRECTORY, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"scale": args.scale, "employers": args.employers, "python": platform.python_version(),
+                   "created_at": datetime.now().isoformat(), "results": results}, file, indent=2)
+    print(f"Results are saved to {path}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
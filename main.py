@@ -1,7 +1,14 @@
+import sys
 from config import config
-from src.entities import Name, Link, Salary, VacancyDescription, Employer, Address
+from src import cli
+from src.connection import ConnectionPool
 from src.databasemanager import DataBaseConnector, DataBaseManager
-from src.parser import HHApiConnector, APIManager
+from src.formatting import print_rows
+from src.querycache import CachedDataManager
+from src.parser import HHApiConnector
+from src.pipeline import Pipeline
+from src.salary import SalaryNormalizer, load_rates
+from src.crawler import CrawlPlanner
 from src.vacancy import Vacancy
 
 
@@ -10,42 +17,44 @@ def main():
 
     # Создаем экземпляр класса HHApiConnector для взаимодействия с API HeadHunter.
     api_connection = HHApiConnector()
-    # Используя коннектор и менеджер соединений, извлекаем данные из API HeadHunter для дальнейшей обработки.
-    connection_manager = APIManager(api_connection)
-    vacancies_raw_data = connection_manager.api_connection()
-    vacancy = Vacancy(Name, Link, Salary, VacancyDescription, Employer, Address)
-    vacancies_processed_data = vacancy.create_vacancy(vacancies_raw_data)
+    # Разбиваем запрос на шарды по работодателям, чтобы не упираться в ограничение пагинации.
+    crawl_planner = CrawlPlanner(api_connection)
     params = config()
-    # Подготавливаем базы данных для хранения полученных данных.
+    # Приводим зарплаты к рублям за вычетом налогов по курсам из локального файла настроек.
+    vacancy = Vacancy(SalaryNormalizer(load_rates()))
+    # Подготавливаем базу данных и потоково загружаем в нее вакансии по мере их получения из API,
+    # закрывая вакансии, которых больше нет в выдаче.
     DataBaseConnector.create_database("vacancies", params)
-    DataBaseConnector.fill_employers(vacancies_processed_data, "vacancies", params)
-    DataBaseConnector.fill_vacancies(vacancies_processed_data, "vacancies", params)
-    db_manager = DataBaseManager("vacancies", params)
-    # Используем коннектор для создания подключения к базе данных.
-    db_connector = DataBaseConnector(db_manager)
-    connection, cursor = db_connector.open_connection()
+    Pipeline(crawl_planner, vacancy, "vacancies", params).run(deactivate_missing=True)
+    # Запросы берут соединение из общего пула на время выполнения операции,
+    # а повторные запросы до следующей загрузки данных отдаются из кэша.
+    db_manager = CachedDataManager(DataBaseManager("vacancies", params))
     while True:
-        available_functions = {"1": db_connector.db_manager.get_companies_and_vacancies_count,
-                               "2": db_connector.db_manager.get_all_vacancies,
-                               "3": db_connector.db_manager.get_avg_salary,
-                               "4": db_connector.db_manager.get_vacancies_with_higher_salary,
-                               "5": db_connector.db_manager.get_vacancies_with_keyword}
+        available_functions = {"1": db_manager.get_companies_and_vacancies_count,
+                               "2": db_manager.get_all_vacancies,
+                               "3": db_manager.get_avg_salary,
+                               "4": db_manager.get_vacancies_with_higher_salary,
+                               "5": db_manager.get_vacancies_with_keyword,
+                               "6": db_manager.get_salary_stats}
         print("Доступные операции:",
               "1 - Список вакансий для каждой компании.",
               "2 - Список всех вакансий.",
               "3 - Средняя зарплата по всем вакансиям",
               "4 - Список вакансий с зарплатой выше средней.",
               "5 - Список вакансий c ключевым словом.",
+              "6 - Статистика зарплат по должностям (в рублях за вычетом налогов).",
               "0 - Завершение работы программы", sep='\n')
         operation = input("Введите номер необходимой операции из предложенных: ")
         if operation == "0":
             break
-        if operation == "5":
-            print(available_functions[operation](cursor, keyword=input("Введите слово: ")))
-        else:
-            print(available_functions[operation](cursor))
-    db_connector.close_connection()
+        arguments = {"keyword": input("Введите слово: ")} if operation == "5" else {}
+        with db_manager.cursor() as cursor:
+            print_rows(available_functions[operation](cursor, **arguments))
+    ConnectionPool.close_all()
 
 
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) > 1:
+        cli.main()
+    else:
+        main()
@@ -0,0 +1,94 @@
+"""
+Module for archiving raw API pages and replaying archived crawls.
+
+Archives are append-only NDJSON files with one page response per line, compressed with zstd
+(when `zstandard` package is installed and file name ends with .zst) or gzip.
+"""
+
+import gzip
+import io
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Iterator, TextIO
+from src.parser import BaseApiConnector
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _open(path: str, mode: str) -> TextIO:
+    """Opens compressed archive for text reading ("r") or appending ("a")."""
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("zstandard package is required for .zst archives, install the archive extra")
+        if mode == "a":
+            stream = zstandard.ZstdCompressor().stream_writer(open(path, "ab"), closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return gzip.open(path, f"{mode}t", encoding="utf-8")
+
+
+class ArchiveWriter:
+    """Thread-safe writer appending raw page responses to the archive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = _open(path, "a")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_crawl(cls, directory: str = "archive") -> "ArchiveWriter":
+        """Returns writer of a new archive file for the crawl started now."""
+        extension = "ndjson.zst" if zstandard is not None else "ndjson.gz"
+        return cls(os.path.join(directory, f"crawl-{datetime.now():%Y%m%d-%H%M%S}.{extension}"))
+
+    def write(self, params: dict[str, Any], body: dict[str, Any]):
+        """Appends page response with the query it was received for."""
+        line = json.dumps({"params": params, "body": body}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line)
+            self._file.write("\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayApiConnector(BaseApiConnector):
+    """API connector streaming vacancies from archived crawl instead of hh.ru."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.vacancies = []
+
+    def iter_pages(self) -> Iterator[list[dict]]:
+        """Yields archived pages deduplicated by vacancy id."""
+        seen_ids = set()
+        with _open(self.path, "r") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                items = [vacancy for vacancy in json.loads(line)["body"].get("items", [])
+                         if vacancy["id"] not in seen_ids]
+                seen_ids.update(vacancy["id"] for vacancy in items)
+                if items:
+                    yield items
+
+    def _get_data(self) -> list[dict]:
+        """Extract data from the archive."""
+        for items in self.iter_pages():
+            self.vacancies.extend(items)
+        return self.vacancies
@@ -0,0 +1,145 @@
+"""
+Module for persistent caching of API responses, sync watermarks and detail records.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+from requests import Request
+
+
+class ResponseCache:
+    """SQLite backed cache of API responses with their ETag and Last-Modified validators.
+
+    Responses not requested for ttl seconds are evicted, and only max_rows most recently used ones are kept;
+    eviction runs on open and after every prune_every stored responses.
+    """
+
+    def __init__(self, path: str = "cache/responses.sqlite", ttl: float = 7 * 24 * 3600, max_rows: int = 100_000,
+                 prune_every: int = 1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._writes = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                        key TEXT PRIMARY KEY,
+                                        etag TEXT,
+                                        last_modified TEXT,
+                                        body TEXT NOT NULL,
+                                        fetched_at REAL NOT NULL
+                                        )""")
+            self._connection.execute("""CREATE TABLE IF NOT EXISTS watermarks (
+                                        name TEXT PRIMARY KEY,
+                                        value TEXT NOT NULL
+                                        )""")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at)")
+        self.prune()
+
+    @staticmethod
+    def make_key(url: str, params: dict[str, Any] = None) -> str:
+        """Returns canonical request URL used as cache key."""
+        ordered_params = sorted((params or {}).items())
+        return Request("GET", url, params=ordered_params).prepare().url
+
+    def get(self, key: str) -> tuple[str | None, str | None, Any] | None:
+        """Returns (etag, last_modified, body) for cached response or None."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, body FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, body = row
+        return etag, last_modified, json.loads(body)
+
+    def set(self, key: str, etag: str | None, last_modified: str | None, body: Any):
+        """Stores response body together with its validators."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, last_modified, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (key, etag, last_modified, json.dumps(body, ensure_ascii=False), time.time()))
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune()
+
+    def touch(self, key: str):
+        """Marks cached response as used, e.g. after the server confirmed it is not modified."""
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE responses SET fetched_at = ? WHERE key = ?", (time.time(), key))
+
+    def prune(self) -> int:
+        """Evicts expired responses and the least recently used ones above max_rows; returns evicted count."""
+        with self._lock, self._connection:
+            evicted = self._connection.execute("DELETE FROM responses WHERE fetched_at < ?",
+                                               (time.time() - self.ttl,)).rowcount
+            evicted += self._connection.execute("""DELETE FROM responses WHERE fetched_at <= (
+                                                   SELECT fetched_at FROM responses
+                                                   ORDER BY fetched_at DESC LIMIT 1 OFFSET ?)""",
+                                                (self.max_rows,)).rowcount
+        return evicted
+
+    def get_watermark(self, name: str) -> str | None:
+        """Returns stored watermark value for the sync."""
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM watermarks WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, name: str, value: str):
+        """Stores watermark value for the sync."""
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO watermarks (name, value) VALUES (?, ?)", (name, value))
+
+    def close(self):
+        self._connection.close()
+
+
+class DetailCache:
+    """SQLite backed cache of employer and vacancy details with TTL and record version."""
+
+    def __init__(self, path: str = "cache/details.sqlite", ttl: float = 7 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("""CREATE TABLE IF NOT EXISTS details (
+                                        kind TEXT NOT NULL,
+                                        id TEXT NOT NULL,
+                                        version TEXT,
+                                        body TEXT NOT NULL,
+                                        fetched_at REAL NOT NULL,
+                                        PRIMARY KEY (kind, id)
+                                        )""")
+
+    def get(self, kind: str, record_id: str, version: str = None) -> Any:
+        """Returns cached body if it is younger than TTL and was fetched for the same version, otherwise None."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version, body, fetched_at FROM details WHERE kind = ? AND id = ?", (kind, record_id)).fetchone()
+        if row is None:
+            return None
+        cached_version, body, fetched_at = row
+        if time.time() - fetched_at > self.ttl or (version is not None and version != cached_version):
+            return None
+        return json.loads(body)
+
+    def set(self, kind: str, record_id: str, version: str | None, body: Any):
+        """Stores body of the record fetched for given version."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO details (kind, id, version, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, record_id, version, json.dumps(body, ensure_ascii=False), time.time()))
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,330 @@
+"""
+Module with non-interactive command line interface.
+
+Examples:
+    python main.py sync --deactivate-missing
+    python main.py fetch --output vacancies.ndjson
+    python main.py sync --archive archive
+    python main.py sync --replay archive/crawl-20240801-120000.ndjson.gz
+    python main.py sync --enrich --details-cache cache/details.sqlite
+    python main.py load --input vacancies.ndjson
+    python main.py query companies avg-salary --format ndjson
+    python main.py query keyword --keyword python --limit 50 --format csv
+    python main.py query snapshots
+    python main.py query new closed salary-changes --since 12
+    python main.py export --input vacancies.ndjson --output columns
+    python main.py query salary-stats --columnar columns
+    python main.py daemon --workers 4 --metrics-port 9100
+"""
+
+import argparse
+import csv
+import json
+import sys
+from decimal import Decimal
+from typing import Iterable, TextIO
+from loguru import logger
+from config import config
+from src.archive import ArchiveWriter, ReplayApiConnector
+from src.cache import DetailCache, ResponseCache
+from src.columnar import ColumnarDataManager, export_records
+from src.crawler import CrawlPlanner
+from src.daemon import SyncDaemon, load_watchlists
+from src.databasemanager import DataBaseConnector, DataBaseManager
+from src.enrichment import Enricher
+from src.metrics import metrics
+from src.parser import BaseApiConnector, HHApiConnector
+from src.pipeline import Pipeline
+from src.salary import SalaryNormalizer, load_rates
+from src.vacancy import Vacancy
+
+QUERIES: dict[str, str] = {"companies": "get_companies_and_vacancies_count",
+                           "vacancies": "get_all_vacancies",
+                           "avg-salary": "get_avg_salary",
+                           "higher-salary": "get_vacancies_with_higher_salary",
+                           "keyword": "get_vacancies_with_keyword",
+                           "salary-stats": "get_salary_stats",
+                           "snapshots": "get_snapshots",
+                           "new": "get_new_vacancies",
+                           "closed": "get_closed_vacancies",
+                           "salary-changes": "get_salary_changes"}
+SNAPSHOT_DIFFS: tuple[str, ...] = ("new", "closed", "salary-changes")
+HISTORY_QUERIES: tuple[str, ...] = ("snapshots", *SNAPSHOT_DIFFS)
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def write_rows(name: str, rows: Iterable[tuple], output_format: str, stream: TextIO, first: bool = True):
+    """Streams rows of the query to the output in JSON, NDJSON or CSV format."""
+    if output_format == "ndjson":
+        for row in rows:
+            stream.write(json.dumps({"query": name, **row._asdict()}, ensure_ascii=False, default=_json_default))
+            stream.write("\n")
+    elif output_format == "csv":
+        writer = None
+        for row in rows:
+            if writer is None:
+                if not first:
+                    stream.write("\n")
+                writer = csv.writer(stream)
+                writer.writerow(["query", *row._fields])
+            writer.writerow([name, *row])
+    else:
+        stream.write(f"{'' if first else ','}\n{json.dumps(name)}: [")
+        for index, row in enumerate(rows):
+            stream.write(("," if index else "") + "\n  ")
+            stream.write(json.dumps(row._asdict(), ensure_ascii=False, default=_json_default))
+        stream.write("\n]")
+    stream.flush()
+
+
+def _connector(args, archive: ArchiveWriter = None) -> BaseApiConnector:
+    """Returns replay connector for --replay or crawl planner over hh.ru, wrapped into enricher for --enrich."""
+    cache = ResponseCache(args.cache) if args.cache else None
+    api = HHApiConnector(concurrency=args.concurrency, keyword=args.keyword, employers_id=args.employer,
+                         cache=cache, incremental=args.incremental, archive=archive, areas=args.area)
+    connector = ReplayApiConnector(args.replay) if args.replay else CrawlPlanner(api)
+    if args.enrich:
+        return Enricher(connector, api, DetailCache(args.details_cache, ttl=args.details_ttl * 3600))
+    return connector
+
+
+def _archive(args) -> ArchiveWriter | None:
+    return ArchiveWriter.for_crawl(args.archive) if args.archive and not args.replay else None
+
+
+def fetch(args):
+    """Fetches raw vacancies from API and writes them as NDJSON."""
+    archive = _archive(args)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for items in metrics.profile_iter("fetch.crawl", _connector(args, archive).iter_pages()):
+            for item in items:
+                output.write(json.dumps(item, ensure_ascii=False))
+                output.write("\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if archive is not None:
+            archive.close()
+
+
+def _read_pages(stream: TextIO, page_size: int) -> Iterable[list[dict]]:
+    page = []
+    for line in stream:
+        if line.strip():
+            page.append(json.loads(line))
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def load(args):
+    """Loads raw vacancies from NDJSON into the database."""
+    params = config(args.config)
+    DataBaseConnector.create_database(args.database, params)
+    source = open(args.input, encoding="utf-8") if args.input else sys.stdin
+    try:
+        with Vacancy(SalaryNormalizer(load_rates(args.config)), workers=args.parse_workers) as vacancy:
+            vacancies = metrics.profile_iter("load.parse", vacancy.iter_vacancies(_read_pages(source, args.batch_size)))
+            with metrics.profile("load.load"):
+                DataBaseConnector.load_stream(vacancies, args.database, params, args.batch_size,
+                                              args.deactivate_missing)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+def sync(args):
+    """Fetches vacancies from API and streams them into the database."""
+    params = config(args.config)
+    DataBaseConnector.create_database(args.database, params)
+    archive = _archive(args)
+    try:
+        with Vacancy(SalaryNormalizer(load_rates(args.config)), workers=args.parse_workers) as vacancy:
+            pipeline = Pipeline(_connector(args, archive), vacancy, args.database, params,
+                                batch_size=args.batch_size)
+            pipeline.run(deactivate_missing=args.deactivate_missing)
+    finally:
+        if archive is not None:
+            archive.close()
+    if pipeline.failures:
+        sys.exit(f"Sync is incomplete: {len(pipeline.failures)} pages or shards failed, "
+                 f"missing vacancies were not deactivated")
+
+
+def export(args):
+    """Parses raw NDJSON vacancies into columnar export for offline analysis."""
+    source = open(args.input, encoding="utf-8") if args.input else sys.stdin
+    try:
+        with Vacancy(SalaryNormalizer(load_rates(args.config)), workers=args.parse_workers) as vacancy:
+            vacancies = metrics.profile_iter("export.parse",
+                                             vacancy.iter_vacancies(_read_pages(source, args.batch_size)))
+            with metrics.profile("export.write"):
+                rows = export_records(vacancies, args.output)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    logger.info(f"Exported {rows} vacancies to {args.output}")
+
+
+def daemon(args):
+    """Periodically syncs watchlists from the config file until stopped."""
+    try:
+        watchlists = load_watchlists(args.config)
+    except ValueError as err:
+        raise SystemExit(str(err))
+    if not watchlists:
+        raise SystemExit(f"No [watchlist:<name>] sections found in {args.config}")
+    params = config(args.config)
+    DataBaseConnector.create_database(args.database, params)
+    with Vacancy(SalaryNormalizer(load_rates(args.config)), workers=args.parse_workers) as vacancy:
+        SyncDaemon(watchlists, vacancy, args.database, params, state_path=args.state, workers=args.workers,
+                   cache=ResponseCache(args.cache),
+                   details_cache=DetailCache(args.details_cache, ttl=args.details_ttl * 3600),
+                   concurrency=args.concurrency).run(once=args.once)
+
+
+def query(args):
+    """Runs one or several queries over one connection and streams their rows to stdout."""
+    if args.columnar:
+        db_manager = ColumnarDataManager(args.columnar)
+    else:
+        db_manager = DataBaseManager(args.database, config(args.config))
+    arguments = {"limit": args.limit} if args.limit is not None else {}
+    if args.format == "json":
+        sys.stdout.write("{")
+    with db_manager.cursor() as cursor:
+        for index, name in enumerate(args.names):
+            method = getattr(db_manager, QUERIES[name])
+            extra = {"keyword": args.keyword} if name == "keyword" else {}
+            if name == "salary-stats":
+                extra["by"] = args.by
+            if name in SNAPSHOT_DIFFS:
+                if args.since is None:
+                    raise SystemExit(f"Query {name} requires --since SNAPSHOT_ID")
+                extra.update(since=args.since, until=args.until)
+            with metrics.stage(f"query.{name}"):
+                write_rows(name, method(cursor, **extra, **arguments), args.format, sys.stdout, first=index == 0)
+    if args.format == "json":
+        sys.stdout.write("\n}\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="hhparser", description="Parser of hh.ru vacancies.")
+    parser.add_argument("--config", default="database.ini", help="database config file")
+    parser.add_argument("--database", default="vacancies", help="database name")
+    parser.add_argument("--log-json", action="store_true", help="write structured JSON logs to stderr")
+    parser.add_argument("--metrics-file", help="write metrics in Prometheus text format to the file on exit")
+    parser.add_argument("--metrics-port", type=int, help="serve metrics on http://0.0.0.0:PORT/metrics")
+    parser.add_argument("--profile", metavar="DIR", help="dump cProfile output per stage and tracemalloc output to DIR")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    crawl_options = argparse.ArgumentParser(add_help=False)
+    crawl_options.add_argument("--keyword", help="search text")
+    crawl_options.add_argument("--employer", action="append", help="employer id, may be repeated")
+    crawl_options.add_argument("--area", action="append", help="area id to search in, may be repeated")
+    crawl_options.add_argument("--concurrency", type=int, default=5, help="concurrent page requests")
+    crawl_options.add_argument("--cache", help="response cache file enabling conditional requests")
+    crawl_options.add_argument("--incremental", action="store_true",
+                               help="fetch only vacancies published after the last sync (requires --cache)")
+    crawl_options.add_argument("--archive", metavar="DIR", help="write raw pages to a new archive in DIR")
+    crawl_options.add_argument("--replay", metavar="FILE", help="read pages from archive instead of hh.ru")
+    crawl_options.add_argument("--enrich", action="store_true",
+                               help="fetch full descriptions of vacancies and profiles of employers")
+    crawl_options.add_argument("--details-cache", default="cache/details.sqlite",
+                               help="cache of fetched vacancy and employer details")
+    crawl_options.add_argument("--details-ttl", type=float, default=168, help="hours before cached details expire")
+    load_options = argparse.ArgumentParser(add_help=False)
+    load_options.add_argument("--batch-size", type=int, default=1000, help="rows per insert batch")
+    load_options.add_argument("--deactivate-missing", action="store_true",
+                              help="close vacancies absent from this load")
+    load_options.add_argument("--parse-workers", type=int, default=1,
+                              help="processes parsing large inputs, 0 uses every core")
+
+    fetch_parser = subparsers.add_parser("fetch", parents=[crawl_options], help="fetch raw vacancies as NDJSON")
+    fetch_parser.add_argument("--output", help="output file, stdout by default")
+    fetch_parser.set_defaults(handler=fetch)
+
+    load_parser = subparsers.add_parser("load", parents=[load_options], help="load raw NDJSON vacancies")
+    load_parser.add_argument("--input", help="input file, stdin by default")
+    load_parser.set_defaults(handler=load)
+
+    sync_parser = subparsers.add_parser("sync", parents=[crawl_options, load_options],
+                                        help="fetch and load vacancies")
+    sync_parser.set_defaults(handler=sync)
+
+    export_parser = subparsers.add_parser("export", help="export raw NDJSON vacancies to column files")
+    export_parser.add_argument("--input", help="input file, stdin by default")
+    export_parser.add_argument("--output", required=True, metavar="DIR", help="directory of column files")
+    export_parser.add_argument("--batch-size", type=int, default=1000, help="vacancies per parsed page")
+    export_parser.add_argument("--parse-workers", type=int, default=1,
+                               help="processes parsing large inputs, 0 uses every core")
+    export_parser.set_defaults(handler=export)
+
+    daemon_parser = subparsers.add_parser("daemon", help="periodically sync watchlists from the config file")
+    daemon_parser.add_argument("--workers", type=int, default=2,
+                               help="watchlists run at the same time, their loads take turns")
+    daemon_parser.add_argument("--state", default="cache/daemon.json", help="file with saved state of jobs")
+    daemon_parser.add_argument("--once", action="store_true", help="sync every watchlist once and exit")
+    daemon_parser.add_argument("--concurrency", type=int, default=5, help="concurrent page requests per sync")
+    daemon_parser.add_argument("--cache", default="cache/responses.sqlite", help="response cache file")
+    daemon_parser.add_argument("--details-cache", default="cache/details.sqlite",
+                               help="cache of fetched vacancy and employer details")
+    daemon_parser.add_argument("--details-ttl", type=float, default=168, help="hours before cached details expire")
+    daemon_parser.add_argument("--parse-workers", type=int, default=1,
+                               help="processes parsing large inputs, 0 uses every core")
+    daemon_parser.set_defaults(handler=daemon)
+
+    query_parser = subparsers.add_parser("query", help="run queries and print results")
+    query_parser.add_argument("names", nargs="+", choices=QUERIES, metavar="name",
+                              help=f"query name: {', '.join(QUERIES)}")
+    query_parser.add_argument("--keyword", default="", help="keyword for the keyword query")
+    query_parser.add_argument("--by", choices=("title", "employer"), default="title",
+                              help="grouping of salary-stats")
+    query_parser.add_argument("--since", type=int, help="snapshot id compared by new, closed and salary-changes")
+    query_parser.add_argument("--until", type=int, help="second compared snapshot id, the latest by default")
+    query_parser.add_argument("--limit", type=int, help="maximum number of rows per query")
+    query_parser.add_argument("--columnar", metavar="DIR", help="query columnar export instead of the database")
+    query_parser.add_argument("--format", choices=("json", "csv", "ndjson"), default="json")
+    query_parser.set_defaults(handler=query)
+    return parser
+
+
+def main(argv: list[str] = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "incremental", False) and not args.cache:
+        # The watermark of the previous sync is stored in the response cache.
+        parser.error("--incremental requires --cache")
+    if getattr(args, "incremental", False) and getattr(args, "deactivate_missing", False):
+        # An incremental sync sees only new vacancies, so every older one would be closed.
+        parser.error("--deactivate-missing cannot be used with --incremental")
+    if args.command == "query" and args.columnar and (history := set(args.names) & set(HISTORY_QUERIES)):
+        # Columnar export holds a single load, without snapshots.
+        parser.error(f"--columnar does not support queries {', '.join(sorted(history))}")
+    if args.log_json:
+        logger.remove()
+        logger.add(sys.stderr, serialize=True)
+    if args.metrics_port:
+        metrics.serve_prometheus(args.metrics_port)
+    if args.profile:
+        metrics.enable_profiling(args.profile)
+    try:
+        if args.command == "query":
+            args.handler(args)
+        else:
+            # Commands are profiled by their stages, which may run in different threads.
+            with metrics.timer("stage_seconds", stage=args.command):
+                args.handler(args)
+    finally:
+        metrics.write_profiles()
+        metrics.log_summary()
+        if args.metrics_file:
+            metrics.write_prometheus(args.metrics_file)
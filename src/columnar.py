@@ -0,0 +1,448 @@
+"""
+Module for exporting parsed vacancies to column files and analysing them in memory without database server.
+
+Export is a directory of NumPy .npy files, one per column. Salaries are float64 with NaN for missing values,
+text columns are UTF-8 bytes with offsets, employer, title and currency columns are dictionary-encoded
+into int32 codes with -1 for missing values. Numpy is required only by this module.
+"""
+
+import bisect
+import json
+import os
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator, TypeVar
+from src.databasemanager import BaseDataManager
+from src.metrics import metrics
+from src.salary import BASE_CURRENCY
+from src.rows import (AverageSalaryRow, CompanyVacanciesRow, KeywordVacancyRow, SalaryStatsRow, VacancyDetailsRow,
+                      VacancyRow)
+from src.vacancy import VacancyRecord
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FORMAT_VERSION = 1
+T = TypeVar("T")
+NUMERIC_COLUMNS: dict[str, str] = {"vacancy_id": "int64", "employer_code": "int32", "title_code": "int32",
+                                   "currency_code": "int32", "bottom_salary": "float64", "top_salary": "float64",
+                                   "bottom_salary_net": "float64", "top_salary_net": "float64", "gross": "int8"}
+TEXT_COLUMNS: tuple[str, ...] = ("link", "responsibility", "requirement", "published_at")
+TEXT_BLOCK_ROWS = 65536
+# Weights of matches in title, responsibilities and requirements, as of weights A, B and C of ts_rank.
+KEYWORD_WEIGHTS: tuple[float, float, float] = (1.0, 0.4, 0.2)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy package is required for columnar export")
+
+
+def _decimal(value: float) -> Decimal:
+    return Decimal(f"{value:.2f}")
+
+
+def _nan(value) -> float:
+    return float("nan") if value is None else float(value)
+
+
+def _write_strings(directory: str, name: str, values: list[str | None]):
+    """Writes text column as concatenated UTF-8 bytes with offsets; None is stored as empty string."""
+    encoded = [(value or "").encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+    np.save(os.path.join(directory, f"{name}.data.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+class StringColumn:
+    """Text column read from export; items are decoded on access, empty strings are returned as None."""
+
+    def __init__(self, directory: str, name: str):
+        self.offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode="r")
+        self.data = np.load(os.path.join(directory, f"{name}.data.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str | None:
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return bytes(self.data[start:end]).decode("utf-8") or None
+
+    def to_array(self) -> "np.ndarray":
+        """Decodes the whole column into numpy string array; meant for small dictionary columns.
+
+        Items of the array are as wide as the longest one, so text columns are searched with `contains`.
+        """
+        data = bytes(self.data)
+        offsets = self.offsets.tolist()
+        return np.array([data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])], dtype=str)
+
+    def contains(self, terms: list[str]) -> "np.ndarray":
+        """Returns boolean matrix of rows containing each of lower-case terms, ignoring case of the rows.
+
+        Rows are decoded TEXT_BLOCK_ROWS at a time into one lower-case string and searched with str.find;
+        matches are mapped back to rows by character offsets, and matches crossing the end of a row are skipped.
+        """
+        found = np.zeros((len(terms), len(self)), dtype=bool)
+        for first in range(0, len(self), TEXT_BLOCK_ROWS):
+            last = min(first + TEXT_BLOCK_ROWS, len(self))
+            offsets = self.offsets[first:last + 1] - self.offsets[first]
+            block = self.data[self.offsets[first]:self.offsets[last]]
+            text = bytes(block).decode("utf-8").lower()
+            lengths = np.diff(offsets)
+            # Characters of a row are its bytes except UTF-8 continuation bytes; empty rows add no bytes.
+            continuation = np.zeros(len(lengths), dtype=np.int64)
+            filled = lengths > 0
+            if filled.any():
+                continuation[filled] = np.add.reduceat((block & 0xC0) == 0x80, offsets[:-1][filled], dtype=np.int64)
+            bounds = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths - continuation, out=bounds[1:])
+            if len(text) != bounds[-1]:
+                # Lower-casing changed the length of some character, so offsets are recomputed row by row.
+                values = [bytes(block[start:end]).decode("utf-8").lower()
+                          for start, end in zip(offsets[:-1], offsets[1:])]
+                np.cumsum([len(value) for value in values], out=bounds[1:])
+                text = "".join(values)
+            bounds = bounds.tolist()
+            for index, term in enumerate(terms):
+                rows = []
+                position = text.find(term)
+                while position >= 0:
+                    row = bisect.bisect_right(bounds, position) - 1
+                    if position + len(term) <= bounds[row + 1]:
+                        rows.append(row)
+                        position = text.find(term, bounds[row + 1])
+                    else:
+                        position = text.find(term, position + 1)
+                found[index, first + np.array(rows, dtype=np.int64)] = True
+        return found
+
+
+class ColumnarWriter:
+    """Writes VacancyRecords as column files; later records of a vacancy win.
+
+    Every written batch is encoded at once: numeric columns are kept as compact arrays and text columns are
+    appended to temporary files, so the records themselves are not held in memory. Column files are assembled
+    on close.
+    """
+
+    def __init__(self, directory: str):
+        _require_numpy()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._employers: dict[int, int] = {}
+        self._employer_names: list[str | None] = []
+        self._employer_urls: list[str | None] = []
+        self._titles: dict[str, int] = {}
+        self._currencies: dict[str, int] = {}
+        self._numeric: dict[str, list["np.ndarray"]] = {name: [] for name in NUMERIC_COLUMNS}
+        self._lengths: dict[str, list["np.ndarray"]] = {name: [] for name in TEXT_COLUMNS}
+        self._text_files = {name: open(self._temporary_path(name), "wb") for name in TEXT_COLUMNS}
+        self.rows = 0
+
+    def _temporary_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.data.tmp")
+
+    def write(self, records: Iterable[VacancyRecord]):
+        records = list(records)
+        if not records:
+            return
+        employer_codes = []
+        for record in records:
+            if record.employer_id is not None and record.employer_id not in self._employers:
+                self._employers[record.employer_id] = len(self._employers)
+                self._employer_names.append(record.employer_name)
+                self._employer_urls.append(record.employer_url)
+            employer_codes.append(self._employers.get(record.employer_id, -1))
+        columns = {"vacancy_id": [record.vacancy_id for record in records],
+                   "employer_code": employer_codes,
+                   "title_code": [self._titles.setdefault(record.name, len(self._titles))
+                                  if record.name is not None else -1 for record in records],
+                   "currency_code": [self._currencies.setdefault(record.currency, len(self._currencies))
+                                     if record.currency is not None else -1 for record in records],
+                   "bottom_salary": [_nan(record.bottom_salary) for record in records],
+                   "top_salary": [_nan(record.top_salary) for record in records],
+                   "bottom_salary_net": [_nan(record.bottom_salary_net) for record in records],
+                   "top_salary_net": [_nan(record.top_salary_net) for record in records],
+                   "gross": [-1 if record.gross is None else int(record.gross) for record in records]}
+        for name, dtype in NUMERIC_COLUMNS.items():
+            self._numeric[name].append(np.array(columns[name], dtype=dtype))
+        for name in TEXT_COLUMNS:
+            encoded = [(getattr(record, name) or "").encode("utf-8") for record in records]
+            self._text_files[name].write(b"".join(encoded))
+            self._lengths[name].append(np.array([len(value) for value in encoded], dtype=np.int64))
+
+    def _column(self, chunks: list["np.ndarray"], dtype) -> "np.ndarray":
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+
+    def _write_text(self, name: str, keep: "np.ndarray"):
+        """Copies kept rows of the temporary text file into column files, TEXT_BLOCK_ROWS rows at a time."""
+        lengths = self._column(self._lengths[name], np.int64)
+        starts = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=starts[1:])
+        sizes = lengths[keep]
+        offsets = np.zeros(len(keep) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        np.save(os.path.join(self.directory, f"{name}.offsets.npy"), offsets)
+        data_path = os.path.join(self.directory, f"{name}.data.npy")
+        if not offsets[-1]:
+            np.save(data_path, np.zeros(0, dtype=np.uint8))
+            return
+        source = np.memmap(self._temporary_path(name), dtype=np.uint8, mode="r")
+        target = np.lib.format.open_memmap(data_path, mode="w+", dtype=np.uint8, shape=(int(offsets[-1]),))
+        for first in range(0, len(keep), TEXT_BLOCK_ROWS):
+            last = min(first + TEXT_BLOCK_ROWS, len(keep))
+            rows = keep[first:last]
+            shifts = np.repeat(starts[rows] - offsets[first:last], sizes[first:last])
+            target[offsets[first]:offsets[last]] = source[np.arange(offsets[first], offsets[last]) + shifts]
+        target.flush()
+        del source, target
+
+    def _remove_temporary_files(self):
+        for name, file in self._text_files.items():
+            file.close()
+            if os.path.exists(self._temporary_path(name)):
+                os.remove(self._temporary_path(name))
+
+    def close(self) -> int:
+        """Writes column files and returns number of exported vacancies."""
+        for file in self._text_files.values():
+            file.close()
+        try:
+            vacancy_ids = self._column(self._numeric["vacancy_id"], np.int64)
+            _, last_from_end = np.unique(vacancy_ids[::-1], return_index=True)
+            keep = np.sort(len(vacancy_ids) - 1 - last_from_end)
+            for name, dtype in NUMERIC_COLUMNS.items():
+                np.save(os.path.join(self.directory, f"{name}.npy"), self._column(self._numeric[name], dtype)[keep])
+            for name in TEXT_COLUMNS:
+                self._write_text(name, keep)
+        finally:
+            self._remove_temporary_files()
+        np.save(os.path.join(self.directory, "employer_id.npy"), np.array(list(self._employers), dtype=np.int64))
+        for name, values in (("employer_name", self._employer_names),
+                             ("employer_url", self._employer_urls),
+                             ("title", list(self._titles)),
+                             ("currency", list(self._currencies))):
+            _write_strings(self.directory, name, values)
+        with open(os.path.join(self.directory, "meta.json"), "w", encoding="utf-8") as file:
+            json.dump({"version": FORMAT_VERSION, "rows": len(keep), "exported_at": datetime.now().isoformat()}, file)
+        self.rows = len(keep)
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self._remove_temporary_files()
+
+
+def export_records(batches: Iterable[list[VacancyRecord]], directory: str) -> int:
+    """Exports batches of VacancyRecords to the directory and returns number of exported vacancies."""
+    with ColumnarWriter(directory) as writer:
+        for records in batches:
+            writer.write(records)
+    return writer.rows
+
+
+class ColumnarDataManager(BaseDataManager):
+    """Data manager answering queries over columnar export with vectorized numpy operations.
+
+    Columns are memory-mapped, so export is opened instantly and only touched columns are read.
+    The cursor argument of query methods is ignored; `cursor()` is kept for callers written for DataBaseManager.
+    Keyword search matches lower-cased terms as substrings instead of stemmed full-text search.
+    """
+
+    def __init__(self, directory: str):
+        _require_numpy()
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as file:
+            meta = json.load(file)
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar export version {meta['version']} in {directory}")
+        self.directory = directory
+        self.rows = meta["rows"]
+        self.vacancy_id = self._load("vacancy_id")
+        self.employer_code = self._load("employer_code")
+        self.title_code = self._load("title_code")
+        self.currency_code = self._load("currency_code")
+        self.bottom_salary = self._load("bottom_salary")
+        self.top_salary = self._load("top_salary")
+        self.bottom_salary_net = self._load("bottom_salary_net")
+        self.top_salary_net = self._load("top_salary_net")
+        self.gross = self._load("gross")
+        self.employer_id = self._load("employer_id")
+        self.link = StringColumn(directory, "link")
+        self.responsibility = StringColumn(directory, "responsibility")
+        self.requirement = StringColumn(directory, "requirement")
+        # Dictionaries are small, they are decoded once; extra "" is looked up by missing code -1.
+        self.employer_names = np.append(StringColumn(directory, "employer_name").to_array(), "")
+        self.titles = np.append(StringColumn(directory, "title").to_array(), "")
+        self.currencies = np.append(StringColumn(directory, "currency").to_array(), "")
+
+    def _load(self, name: str) -> "np.ndarray":
+        return np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+
+    def cursor(self):
+        return nullcontext()
+
+    @staticmethod
+    def _iter_rows(method: str, query: Callable[..., Iterable[T]], *args) -> Iterator[T]:
+        """Lazily runs the query and records its metrics like DataBaseManager does."""
+        started_at = time.perf_counter()
+        rows = 0
+        for row in query(*args):
+            rows += 1
+            yield row
+        metrics.observe("query_seconds", time.perf_counter() - started_at, method=method, backend="columnar")
+        metrics.inc("query_rows_total", rows, method=method, backend="columnar")
+
+    @staticmethod
+    def _ordered(keys: list["np.ndarray"], after: tuple | None, limit: int | None,
+                 mask: "np.ndarray" = None) -> "np.ndarray":
+        """Returns indices of masked rows ordered descending by keys, starting after keyset position."""
+        selected = np.ones(len(keys[0]), dtype=bool) if mask is None else np.array(mask, dtype=bool)
+        if after is not None:
+            before, equal = np.zeros_like(selected), np.ones_like(selected)
+            for column, value in zip(keys, after):
+                if column.dtype.kind == "f":
+                    value = float(value)
+                elif column.dtype.kind == "U" and value is None:
+                    value = ""
+                before |= equal & (column < value)
+                equal &= column == value
+            selected &= before
+        indices = np.flatnonzero(selected)
+        order = np.lexsort([column[indices] for column in reversed(keys)])[::-1]
+        return indices[order[:limit]]
+
+    @staticmethod
+    def _text(value) -> str | None:
+        return str(value) or None
+
+    def get_companies_and_vacancies_count(self, cursor, limit: int = None,
+                                          after: tuple = None) -> Iterator[CompanyVacanciesRow]:
+        """Method for getting number of vacancies grouped by employer."""
+        return self._iter_rows("get_companies_and_vacancies_count", self._companies, limit, after)
+
+    def _companies(self, limit: int | None, after: tuple | None) -> Iterator[CompanyVacanciesRow]:
+        codes = self.employer_code[self.employer_code >= 0]
+        counts = np.bincount(codes, minlength=len(self.employer_id))
+        for index in self._ordered([counts, self.employer_id], after, limit, counts > 0):
+            yield CompanyVacanciesRow(int(self.employer_id[index]), self._text(self.employer_names[index]),
+                                      int(counts[index]))
+
+    def get_all_vacancies(self, cursor, limit: int = 15, after: tuple = None) -> Iterator[VacancyRow]:
+        """Method for getting list of all vacancies."""
+        return self._iter_rows("get_all_vacancies", self._all_vacancies, limit, after)
+
+    def _all_vacancies(self, limit: int | None, after: tuple | None) -> Iterator[VacancyRow]:
+        mask = ~np.isnan(self.top_salary) & (self.employer_code >= 0)
+        for index in self._ordered([self.top_salary, self.vacancy_id], after, limit, mask):
+            yield VacancyRow(int(self.vacancy_id[index]), self._text(self.employer_names[self.employer_code[index]]),
+                             self._text(self.titles[self.title_code[index]]), int(self.top_salary[index]),
+                             self.link[index])
+
+    def get_avg_salary(self, cursor, limit: int = 15, after: tuple = None) -> Iterator[AverageSalaryRow]:
+        """Method for getting average salary by vacancy title and currency."""
+        return self._iter_rows("get_avg_salary", self._avg_salary, limit, after)
+
+    def _avg_salary(self, limit: int | None, after: tuple | None) -> Iterator[AverageSalaryRow]:
+        mask = ~np.isnan(self.top_salary_net)
+        groups, inverse = np.unique(self.title_code[mask], return_inverse=True)
+        averages = np.round(np.bincount(inverse, weights=self.top_salary_net[mask]) / np.bincount(inverse), 2)
+        names, currencies = self.titles[groups], np.full(len(groups), BASE_CURRENCY)
+        for index in self._ordered([averages, names, currencies], after, limit):
+            yield AverageSalaryRow(self._text(names[index]), BASE_CURRENCY, _decimal(averages[index]))
+
+    def get_vacancies_with_higher_salary(self, cursor, limit: int = None,
+                                         after: tuple = None) -> Iterator[VacancyDetailsRow]:
+        """Method for getting list of vacancies which salary is higher than average by all vacancies."""
+        return self._iter_rows("get_vacancies_with_higher_salary", self._higher_salary, limit, after)
+
+    def _higher_salary(self, limit: int | None, after: tuple | None) -> Iterator[VacancyDetailsRow]:
+        salaries = np.round(self.top_salary_net, 2)
+        if np.isnan(salaries).all():
+            return
+        mask = salaries > np.nanmean(salaries)
+        for index in self._ordered([salaries, self.vacancy_id], after, limit, mask):
+            code, gross = self.employer_code[index], self.gross[index]
+            bottom_salary, top_salary = self.bottom_salary[index], self.top_salary[index]
+            yield VacancyDetailsRow(int(self.vacancy_id[index]),
+                                    int(self.employer_id[code]) if code >= 0 else None,
+                                    self._text(self.titles[self.title_code[index]]), self.link[index],
+                                    None if np.isnan(bottom_salary) else int(bottom_salary),
+                                    None if np.isnan(top_salary) else int(top_salary),
+                                    self._text(self.currencies[self.currency_code[index]]),
+                                    None if gross < 0 else bool(gross),
+                                    self.responsibility[index], self.requirement[index], _decimal(salaries[index]))
+
+    def get_vacancies_with_keyword(self, cursor, keyword: str, limit: int = 20,
+                                   after: tuple = None) -> Iterator[KeywordVacancyRow]:
+        """Method for search of vacancies by keyword terms ranked by weighted matches in title and snippet."""
+        return self._iter_rows("get_vacancies_with_keyword", self._keyword, keyword, limit, after)
+
+    def _keyword(self, keyword: str, limit: int | None, after: tuple | None) -> Iterator[KeywordVacancyRow]:
+        text = keyword.strip().lower()
+        terms = text.split()
+        titles = np.char.lower(self.titles)
+        ranks = np.zeros(self.rows)
+        title_weight, responsibility_weight, requirement_weight = KEYWORD_WEIGHTS
+        for term in terms:
+            # Titles are matched once per dictionary entry and spread to rows by their codes.
+            ranks += title_weight * (np.char.find(titles, term) >= 0)[self.title_code]
+        if terms:
+            ranks += responsibility_weight * self.responsibility.contains(terms).sum(axis=0)
+            ranks += requirement_weight * self.requirement.contains(terms).sum(axis=0)
+        mask = (ranks > 0) | (np.char.find(titles, text) >= 0)[self.title_code]
+        for index in self._ordered([ranks, self.vacancy_id], after, limit, mask):
+            yield KeywordVacancyRow(int(self.vacancy_id[index]), self._text(self.titles[self.title_code[index]]),
+                                    self.link[index], self.responsibility[index], self.requirement[index],
+                                    float(ranks[index]))
+
+    def get_salary_stats(self, cursor, by: str = "title", limit: int = 15,
+                         after: tuple = None) -> Iterator[SalaryStatsRow]:
+        """Method for getting mean, median and percentiles of normalized salary per title or per employer."""
+        return self._iter_rows("get_salary_stats", self._salary_stats, by, limit, after)
+
+    def _salary_stats(self, by: str, limit: int | None, after: tuple | None) -> Iterator[SalaryStatsRow]:
+        bottom, top = self.bottom_salary_net, self.top_salary_net
+        salaries = (np.where(np.isnan(bottom), top, bottom) + np.where(np.isnan(top), bottom, top)) / 2
+        mask = ~np.isnan(salaries)
+        if by == "title":
+            names, codes = self.titles, self.title_code[mask]
+        else:
+            # Employers sharing a name are one group and anonymous employers are skipped, as in the database query.
+            mask &= self.employer_code >= 0
+            names, employer_name_codes = np.unique(self.employer_names[:-1], return_inverse=True)
+            names = np.append(names, "")
+            codes = employer_name_codes[self.employer_code[mask]]
+        values = salaries[mask]
+        order = np.lexsort((values, codes))
+        codes, values = codes[order], values[order]
+        groups, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+        if not len(groups):
+            return
+
+        def percentile(share: float) -> "np.ndarray":
+            position = starts + share * (counts - 1)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.ceil(position).astype(np.int64)
+            return np.round(values[lower] + (values[upper] - values[lower]) * (position - lower), 2)
+
+        means = np.round(np.add.reduceat(values, starts) / counts, 2)
+        medians, p25, p75, p90 = percentile(0.5), percentile(0.25), percentile(0.75), percentile(0.9)
+        group_names = names[groups]
+        for index in self._ordered([medians, group_names], after, limit):
+            yield SalaryStatsRow(self._text(group_names[index]), int(counts[index]), _decimal(means[index]),
+                                 _decimal(medians[index]), _decimal(p25[index]), _decimal(p75[index]),
+                                 _decimal(p90[index]))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.directory!r})"
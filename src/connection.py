@@ -0,0 +1,68 @@
+"""
+Module for sharing pooled database connections between loaders and query workers.
+"""
+
+import threading
+from contextlib import contextmanager
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class ConnectionPool:
+    """Thread-safe pool of connections to one database, shared per database name."""
+    _pools: dict[str, "ConnectionPool"] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, database_name: str, params: dict, minconn: int = 1, maxconn: int = 10):
+        self.database_name = database_name
+        self._pool = ThreadedConnectionPool(minconn, maxconn, dbname=database_name, **params)
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    @classmethod
+    def get(cls, database_name: str, params: dict, minconn: int = 1, maxconn: int = 10) -> "ConnectionPool":
+        """Returns shared pool for the database, creating it on first use."""
+        with cls._lock:
+            if database_name not in cls._pools:
+                cls._pools[database_name] = cls(database_name, params, minconn, maxconn)
+            return cls._pools[database_name]
+
+    @classmethod
+    def close_all(cls):
+        """Closes every shared pool."""
+        with cls._lock:
+            for pool in cls._pools.values():
+                pool._pool.closeall()
+            cls._pools.clear()
+
+    def getconn(self):
+        """Borrows connection, waiting while all connections are in use."""
+        self._slots.acquire()
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, connection):
+        """Returns borrowed connection to the pool."""
+        self._pool.putconn(connection)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrows connection for one transaction: commits on success and rolls back on error."""
+        connection = self.getconn()
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            self.putconn(connection)
+
+    @contextmanager
+    def cursor(self):
+        """Borrows cursor that runs inside its own transaction."""
+        with self.connection() as connection:
+            with connection.cursor() as cursor:
+                yield cursor
@@ -0,0 +1,137 @@
+"""
+Module for splitting a search into shards that fit under the hh.ru pagination ceiling.
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator
+from loguru import logger
+from src.parser import BaseApiConnector, HHApiConnector, log_error
+from src.resilience import CrawlIncomplete
+
+_SHARD_DONE = object()
+
+
+class CrawlPlanner(BaseApiConnector):
+    """Crawl planner that shards the query by employer, area and publication date window."""
+    _date_format: str = "%Y-%m-%dT%H:%M:%S"
+
+    def __init__(self, connector: HHApiConnector, shard_concurrency: int = 4, period_days: int = 30,
+                 min_window: timedelta = timedelta(hours=1)):
+        self.connector = connector
+        self.shard_concurrency = max(1, shard_concurrency)
+        # Every shard fetches its pages with connector.concurrency workers of its own.
+        connector.reserve_connections((self.shard_concurrency - 1) * connector.concurrency)
+        self.period_days = period_days
+        self.min_window = min_window
+        self.vacancies = []
+        self.failures: list[str] = []
+
+    def _plan(self, params: dict[str, Any]) -> list[tuple[dict[str, Any], dict[str, Any]]]:
+        """Returns list of shards with their first pages, splitting shards that exceed the ceiling."""
+        first_page = self.connector._get_page(params, 0)
+        if first_page.get("found", 0) <= self.connector.results_ceiling:
+            return [(params, first_page)]
+        areas = params.get("area")
+        if isinstance(areas, list) and len(areas) > 1:
+            # Only areas the search is already filtered by may be split, others would be dropped from the crawl.
+            return [shard for area in areas for shard in self._plan({**params, "area": [area]})]
+        date_from = datetime.strptime(params["date_from"], CrawlPlanner._date_format)
+        date_to = datetime.strptime(params["date_to"], CrawlPlanner._date_format)
+        if date_to - date_from <= self.min_window:
+            logger.warning(f"Shard {params} still exceeds pagination ceiling, results are truncated.")
+            return [(params, first_page)]
+        middle = (date_from + (date_to - date_from) / 2).strftime(CrawlPlanner._date_format)
+        return self._plan({**params, "date_to": middle}) + self._plan({**params, "date_from": middle})
+
+    def _align(self, moment: datetime, up: bool = False) -> datetime:
+        """Rounds the moment to the min_window grid, so that windows and cache keys repeat between syncs."""
+        epoch = datetime(2000, 1, 1)
+        steps, remainder = divmod(moment - epoch, self.min_window)
+        if up and remainder:
+            steps += 1
+        return epoch + steps * self.min_window
+
+    def _shard_params(self) -> list[dict[str, Any]]:
+        """Returns one query per employer covering the whole search period.
+
+        Period bounds are widened to the min_window grid: date_to "now" would make every request and its
+        cache key unique, so conditional requests could never be answered with 304.
+        """
+        date_to = self._align(datetime.now(), up=True)
+        date_from = date_to - timedelta(days=self.period_days)
+        base_params = self.connector._build_params()
+        if "date_from" in base_params:
+            watermark = datetime.strptime(base_params["date_from"], HHApiConnector._published_format)
+            date_from = max(date_from, self._align(watermark.astimezone().replace(tzinfo=None)))
+        base_params["date_from"] = date_from.strftime(CrawlPlanner._date_format)
+        base_params["date_to"] = date_to.strftime(CrawlPlanner._date_format)
+        return [{**base_params, "employer_id": employer_id} for employer_id in self.connector.employers_id]
+
+    def _crawl_shard(self, params: dict[str, Any], pages: queue.Queue, stop: threading.Event):
+        """Plans and fetches all pages of a single employer shard, putting them into the queue."""
+        try:
+            for shard_params, first_page in self._plan(params):
+                for items in self.connector._iter_pages(shard_params, first_page):
+                    if not _put(pages, items, stop):
+                        return
+        except Exception as err:
+            # Any lost shard, not only one out of retries, must keep the crawl from deactivating its vacancies.
+            log_error(f"Shard for employer {params['employer_id']} is incomplete: {err}")
+            self.failures.append(f"shard of employer {params['employer_id']}: {err}")
+        finally:
+            _put(pages, _SHARD_DONE, stop)
+
+    def iter_pages(self) -> Iterator[list[dict]]:
+        """Runs employer shards in parallel and yields their pages deduplicated by vacancy id.
+
+        Raises CrawlIncomplete after the last page if some shards or pages failed.
+        """
+        self.failures = []
+        self.connector.failures = []
+        shards = self._shard_params()
+        pages = queue.Queue(maxsize=self.shard_concurrency * 2)
+        stop = threading.Event()
+        seen_ids = set()
+        with ThreadPoolExecutor(max_workers=self.shard_concurrency) as executor:
+            for params in shards:
+                executor.submit(self._crawl_shard, params, pages, stop)
+            try:
+                finished = 0
+                while finished < len(shards):
+                    items = pages.get()
+                    if items is _SHARD_DONE:
+                        finished += 1
+                        continue
+                    unique = [vacancy for vacancy in items if vacancy["id"] not in seen_ids]
+                    seen_ids.update(vacancy["id"] for vacancy in unique)
+                    if unique:
+                        yield unique
+            finally:
+                stop.set()
+        failures = self.failures + self.connector.failures
+        if failures:
+            raise CrawlIncomplete(failures)
+
+    def update_watermark(self, vacancies: Iterable[dict]):
+        self.connector.update_watermark(vacancies)
+
+    def _get_data(self) -> list[dict]:
+        """Runs employer shards in parallel and merges results deduplicated by vacancy id."""
+        seen_ids = {vacancy["id"] for vacancy in self.vacancies}
+        for items in self.iter_pages():
+            self.vacancies.extend(vacancy for vacancy in items if vacancy["id"] not in seen_ids)
+        return self.vacancies
+
+
+def _put(pages: queue.Queue, item, stop: threading.Event) -> bool:
+    """Puts item into bounded queue, giving up when consumer has stopped."""
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
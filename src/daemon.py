@@ -0,0 +1,220 @@
+"""
+Module for running periodic syncs of several watchlists in one long-running process.
+
+Watchlists are sections of the config file named "watchlist:<name>":
+
+    [watchlist:python]
+    keyword = Python
+    employers = 1740, 3529
+    areas = 1, 2
+    interval = 60
+    jitter = 0.1
+    enrich = yes
+
+employers are required, areas limit the search to these regions; interval is in minutes;
+jitter is the share of interval added to or subtracted from every delay at random.
+"""
+
+import heapq
+import json
+import os
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from configparser import ConfigParser
+from typing import Any, NamedTuple
+from loguru import logger
+from config import config
+from src.cache import DetailCache, ResponseCache
+from src.crawler import CrawlPlanner
+from src.enrichment import Enricher
+from src.metrics import metrics
+from src.parser import HHApiConnector
+from src.pipeline import Pipeline
+from src.resilience import CircuitBreaker, TokenBucket
+from src.vacancy import BaseVacancy
+
+WATCHLIST_PREFIX = "watchlist:"
+
+
+class Watchlist(NamedTuple):
+    name: str
+    keyword: str | None
+    employers: list[str]
+    areas: list[str]
+    interval: float
+    jitter: float = 0.1
+    enrich: bool = False
+
+
+def _split(value: str | None) -> list[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def load_watchlists(filename: str = "database.ini") -> list[Watchlist]:
+    """Returns watchlists from "watchlist:<name>" sections of the config file."""
+    parser = ConfigParser()
+    parser.read(filename)
+    watchlists = []
+    for section in parser.sections():
+        if not section.startswith(WATCHLIST_PREFIX):
+            continue
+        options = config(filename, section)
+        employers = _split(options.get("employers"))
+        if not employers:
+            # Crawls are sharded by employer, a watchlist without them would silently crawl the default ones.
+            raise ValueError(f"Watchlist {section} in {filename} has no employers")
+        watchlists.append(Watchlist(name=section[len(WATCHLIST_PREFIX):],
+                                    keyword=options.get("keyword") or None,
+                                    employers=employers,
+                                    areas=_split(options.get("areas")),
+                                    interval=float(options.get("interval", 60)) * 60,
+                                    jitter=float(options.get("jitter", 0.1)),
+                                    enrich=parser.getboolean(section, "enrich", fallback=False)))
+    return watchlists
+
+
+class SyncDaemon:
+    """Scheduler running syncs of watchlists periodically on a bounded pool of workers.
+
+    The next run of a watchlist is scheduled only when its current run finishes, so runs of one watchlist
+    never overlap. Runs of different watchlists stream their crawls into the database one at a time, see
+    DataBaseConnector._lock_loads: a run waiting for another one fetches only its first batch and the pages
+    that fit into the pipeline queue, so extra workers mainly keep a slow watchlist from delaying the
+    schedule of the others. State of every job is saved to JSON file after each change;
+    after restart jobs resume from their saved next run, and a run interrupted by the restart is repeated at once.
+    """
+
+    def __init__(self, watchlists: list[Watchlist], vacancy: BaseVacancy, database_name: str, params: dict,
+                 state_path: str = "cache/daemon.json", workers: int = 2, cache: ResponseCache = None,
+                 details_cache: DetailCache = None, concurrency: int = 5):
+        self.watchlists = {watchlist.name: watchlist for watchlist in watchlists}
+        self.vacancy = vacancy
+        self.database_name = database_name
+        self.params = params
+        self.state_path = state_path
+        self.workers = max(1, workers)
+        self.cache = cache or ResponseCache()
+        self.details_cache = details_cache
+        self.concurrency = concurrency
+        # Jobs share one rate limit and one circuit breaker, as they all talk to the same API.
+        self.rate_limiter = TokenBucket(rate=5, capacity=10)
+        self.circuit_breaker = CircuitBreaker()
+        self.state: dict[str, dict[str, Any]] = {}
+        self._queue: list[tuple[float, str]] = []
+        self._running: set[str] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def _delay(self, watchlist: Watchlist) -> float:
+        return watchlist.interval * (1 + random.uniform(-watchlist.jitter, watchlist.jitter))
+
+    def _load_state(self):
+        """Reads saved job state and schedules every watchlist."""
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as file:
+                self.state = json.load(file)
+        now = time.time()
+        for name, watchlist in self.watchlists.items():
+            job = self.state.setdefault(name, {})
+            if job.get("started_at", 0) > job.get("finished_at", 0):
+                next_run = now
+            else:
+                # New watchlists are spread over their first interval instead of starting all at once.
+                next_run = job.get("next_run") or now + random.uniform(0, watchlist.interval * watchlist.jitter)
+            heapq.heappush(self._queue, (next_run, name))
+
+    def _save_state(self):
+        """Atomically writes job state to the state file; call with the lock held."""
+        if os.path.dirname(self.state_path):
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        temporary_path = f"{self.state_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(self.state, file, indent=2)
+        os.replace(temporary_path, self.state_path)
+
+    def _connector(self, watchlist: Watchlist):
+        api = HHApiConnector(concurrency=self.concurrency, keyword=watchlist.keyword, employers_id=watchlist.employers,
+                             cache=self.cache, incremental=True, areas=watchlist.areas,
+                             rate_limiter=self.rate_limiter, circuit_breaker=self.circuit_breaker)
+        connector = CrawlPlanner(api)
+        if watchlist.enrich:
+            return Enricher(connector, api, self.details_cache)
+        return connector
+
+    def _run_job(self, name: str):
+        """Syncs the watchlist, records the outcome and schedules its next run."""
+        watchlist = self.watchlists[name]
+        status, rows = "ok", None
+        try:
+            with metrics.timer("daemon_job_seconds", job=name):
+                # Watchlists cover only part of vacancies, so vacancies missing from one of them stay open.
+                pipeline = Pipeline(self._connector(watchlist), self.vacancy, self.database_name, self.params)
+                rows = pipeline.run(deactivate_missing=False)
+            if pipeline.failures:
+                # Loaded vacancies are kept, the watermark stays behind the gap for the next run.
+                status = "incomplete"
+        except Exception as err:
+            status = "failed"
+            logger.exception(f"Sync of watchlist {name} failed: {err}")
+        metrics.inc("daemon_job_runs_total", job=name, status=status)
+        finished_at = time.time()
+        next_run = finished_at + self._delay(watchlist)
+        with self._lock:
+            job = self.state[name]
+            job.update(finished_at=finished_at, next_run=next_run, status=status)
+            job["failures"] = 0 if status == "ok" else job.get("failures", 0) + 1
+            if rows is not None:
+                job["rows"] = rows
+            self._running.discard(name)
+            heapq.heappush(self._queue, (next_run, name))
+            self._save_state()
+        self._wake.set()
+        logger.info(f"Watchlist {name}: {status}, {rows} vacancies, next run in {next_run - finished_at:.0f} s")
+
+    def _submit_due(self, executor: ThreadPoolExecutor) -> float:
+        """Submits jobs that are due and returns seconds until the next one."""
+        with self._lock:
+            now = time.time()
+            while self._queue and self._queue[0][0] <= now:
+                _, name = heapq.heappop(self._queue)
+                if name in self._running:
+                    metrics.inc("daemon_overlaps_skipped_total", job=name)
+                    continue
+                self._running.add(name)
+                self.state[name]["started_at"] = now
+                self._save_state()
+                executor.submit(self._run_job, name)
+            return self._queue[0][0] - now if self._queue else float("inf")
+
+    def stop(self, *args):
+        """Stops scheduling; runs in progress are finished before run() returns."""
+        self._stop.set()
+        self._wake.set()
+
+    def run(self, once: bool = False):
+        """Runs scheduler until stopped; with once runs every watchlist a single time and returns."""
+        self._load_state()
+        if not once and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+        logger.info(f"Daemon started with watchlists: {', '.join(self.watchlists)}")
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            if once:
+                self._queue = [(0, name) for name in self.watchlists]
+                self._submit_due(executor)
+                return
+            while not self._stop.is_set():
+                self._wake.clear()
+                self._wake.wait(min(self._submit_due(executor), 60))
+        finally:
+            # Jobs waiting for a worker are dropped on stop; their state marks them to run first after restart.
+            executor.shutdown(wait=True, cancel_futures=self._stop.is_set())
+            logger.info("Daemon stopped")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({', '.join(self.watchlists)})"
@@ -1,109 +1,263 @@
 from abc import ABC, abstractmethod
+import time
+import uuid
+from typing import Callable, Iterable, Iterator, TypeVar
 import psycopg2
-from psycopg2 import OperationalError
-from enum import Enum
+from psycopg2 import OperationalError, sql
+from psycopg2.extras import execute_values
+from src.connection import ConnectionPool
+from src.metrics import metrics
+from src.rows import (AverageSalaryRow, CompanyVacanciesRow, HistoryVacancyRow, KeywordVacancyRow, SalaryChangeRow,
+                      SalaryStatsRow, SnapshotRow, VacancyDetailsRow, VacancyRow)
+from src.schema import AGGREGATE_VIEWS, drop_expired_history, ensure_history_partition, migrate
+from src.vacancy import VacancyRecord
 
-
-class VacancyFields(Enum):
-    """Container for specifying indexes that used for extracting data from list of vacancies during writing queries."""
-    NAME = 0
-    LINK = 1
-    PAY = 2
-    EMPLOYER_INFO = 3
-    DESCRIPTION = 4
-    ADDRESS = 5
+BATCH_SIZE = 1000
+T = TypeVar("T")
 
 
 class BaseDataManager(ABC):
 
     @abstractmethod
-    def get_companies_and_vacancies_count(self, cursor):
+    def get_companies_and_vacancies_count(self, cursor, limit=None, after=None) -> Iterator[CompanyVacanciesRow]:
         pass
 
     @abstractmethod
-    def get_all_vacancies(self, cursor):
+    def get_all_vacancies(self, cursor, limit=15, after=None) -> Iterator[VacancyRow]:
         pass
 
     @abstractmethod
-    def get_avg_salary(self, cursor):
+    def get_avg_salary(self, cursor, limit=15, after=None) -> Iterator[AverageSalaryRow]:
         pass
 
     @abstractmethod
-    def get_vacancies_with_higher_salary(self, cursor):
+    def get_vacancies_with_higher_salary(self, cursor, limit=None, after=None) -> Iterator[VacancyDetailsRow]:
         pass
 
     @abstractmethod
-    def get_vacancies_with_keyword(self, cursor, keyword):
+    def get_vacancies_with_keyword(self, cursor, keyword, limit=20, after=None) -> Iterator[KeywordVacancyRow]:
         pass
 
 
 class DataBaseManager(BaseDataManager):
-    """Class for interacting with database."""
+    """Class for interacting with database.
+
+    Query methods return lazy iterators of typed rows streamed through server-side cursors, so they have to be
+    consumed while the cursor's transaction is open. Pass `key` of the last received row as `after`
+    to get the next page.
+    """
+    itersize: int = 2000
 
     def __init__(self, db_name: str, params: dict):
         self.db_name = db_name
         self.params = params
 
-    def get_companies_and_vacancies_count(self, cursor):
+    @property
+    def pool(self) -> ConnectionPool:
+        """Shared connection pool of the database."""
+        return ConnectionPool.get(self.db_name, self.params)
+
+    def cursor(self):
+        """Borrows pooled cursor running in its own transaction."""
+        return self.pool.cursor()
+
+    def _iter_rows(self, cursor, method: str, query: str, params: dict, row_type: type[T]) -> Iterator[T]:
+        """Streams query results through named server-side cursor on the connection of given cursor."""
+        started_at = time.perf_counter()
+        with cursor.connection.cursor(name=f"{method}_{uuid.uuid4().hex}") as named_cursor:
+            named_cursor.itersize = self.itersize
+            named_cursor.execute(query, params)
+            metrics.observe("query_first_row_seconds", time.perf_counter() - started_at, method=method)
+            rows = 0
+            for row in named_cursor:
+                rows += 1
+                yield row_type(*row)
+        metrics.observe("query_seconds", time.perf_counter() - started_at, method=method)
+        metrics.inc("query_rows_total", rows, method=method)
+
+    @staticmethod
+    def _after(columns: str, after: tuple | None) -> str:
+        """Returns keyset pagination condition for rows ordered descending by given columns.
+
+        Nullable columns must be wrapped in COALESCE(column, '') both here and in ORDER BY: a NULL in the row
+        comparison makes it NULL, and the page after such a row would be empty.
+        """
+        return f"AND ({columns}) < %(after)s" if after is not None else ""
+
+    @staticmethod
+    def _keyset(after: tuple | None) -> tuple | None:
+        """Returns keyset position with NULL text keys replaced by empty strings, as they are compared."""
+        return tuple("" if value is None else value for value in after) if after is not None else None
+
+    def get_companies_and_vacancies_count(self, cursor, limit: int = None,
+                                          after: tuple = None) -> Iterator[CompanyVacanciesRow]:
         """Method for getting number of vacancies grouped by employer name."""
-        cursor.execute("""SELECT employers.name, COUNT(*) AS total_vacancies FROM employers
-                            JOIN vacancies ON vacancies.employer_id = employers.id
-                            GROUP BY employers.name ORDER BY total_vacancies DESC""")
-        return "\n".join(
-            [f"Компания: {company}, количество вакансий: {vacancies}" for company, vacancies in cursor.fetchall()])
+        return self._iter_rows(cursor, "get_companies_and_vacancies_count",
+                               f"""SELECT employer_id, name, total_vacancies FROM employer_vacancy_counts
+                                   WHERE TRUE {self._after("total_vacancies, employer_id", after)}
+                                   ORDER BY total_vacancies DESC, employer_id DESC
+                                   LIMIT %(limit)s""",
+                               {"after": after, "limit": limit}, CompanyVacanciesRow)
 
-    def get_all_vacancies(self, cursor):
+    def get_all_vacancies(self, cursor, limit: int = 15, after: tuple = None) -> Iterator[VacancyRow]:
         """Method for getting list of all vacancies."""
-        cursor.execute("""SELECT employers.name AS employer_name, vacancies.name 
-                                    AS vacancy_name , top_salary, vacancies.link AS vacancy_link FROM employers
-                                    JOIN vacancies ON vacancies.employer_id = employers.id
-                                    WHERE top_salary IS NOT NULL
-                                    ORDER BY top_salary DESC LIMIT 15""")
-        return "\n".join([f"Компания: {company}, "
-                          f"Должность {position}, "
-                          f"Зарплата до: {salary}, "
-                          f"Ссылка: {link}" for company, position, salary, link in cursor.fetchall()])
-
-    def get_avg_salary(self, cursor):
-        """Method for getting average salary by vacancies."""
-        cursor.execute("""SELECT name, AVG(top_salary)::numeric(10,2) AS avg_salary FROM vacancies
-                                    WHERE top_salary IS NOT NULL
-                                    GROUP BY name, top_salary
-                                    ORDER BY top_salary DESC LIMIT 15""")
-        return "\n".join(
-            [f"Должность: {position}, Средняя зарплата: {avg_salary}" for position, avg_salary in cursor.fetchall()])
-
-    def get_vacancies_with_higher_salary(self, cursor):
+        return self._iter_rows(cursor, "get_all_vacancies",
+                               f"""SELECT vacancies.vacancy_id, employers.name, vacancies.name, top_salary,
+                                   vacancies.link FROM employers
+                                   JOIN vacancies ON vacancies.employer_id = employers.id
+                                   WHERE top_salary IS NOT NULL AND vacancies.is_active
+                                   {self._after("top_salary, vacancies.vacancy_id", after)}
+                                   ORDER BY top_salary DESC, vacancies.vacancy_id DESC
+                                   LIMIT %(limit)s""",
+                               {"after": after, "limit": limit}, VacancyRow)
+
+    def get_avg_salary(self, cursor, limit: int = 15, after: tuple = None) -> Iterator[AverageSalaryRow]:
+        """Method for getting average normalized top salary by vacancy title."""
+        return self._iter_rows(cursor, "get_avg_salary",
+                               f"""SELECT name, currency, avg_salary FROM salary_stats_by_title
+                                   WHERE TRUE
+                                   {self._after("avg_salary, COALESCE(name, ''), COALESCE(currency, '')", after)}
+                                   ORDER BY avg_salary DESC, COALESCE(name, '') DESC, COALESCE(currency, '') DESC
+                                   LIMIT %(limit)s""",
+                               {"after": self._keyset(after), "limit": limit}, AverageSalaryRow)
+
+    def get_vacancies_with_higher_salary(self, cursor, limit: int = None,
+                                         after: tuple = None) -> Iterator[VacancyDetailsRow]:
         """Method for getting list of vacancies which salary is higher than average by all vacancies."""
-        cursor.execute("""SELECT * FROM vacancies
-                                    WHERE top_salary > (SELECT AVG(top_salary) FROM vacancies)
-                                    ORDER BY top_salary DESC""")
-        return "\n".join([f"id: {vacancy_id}, "
-                          f"employer_id: {employer_id}, "
-                          f"Должность: {position}, "
-                          f"Ссылка: {link}, "
-                          f"Зарплата от {bottom_salary} до {top_salary},"
-                          f"Валюта: {currency},"
-                          f"До вычета налогов {gross},"
-                          f"Обязанности: {responsibilities},"
-                          f"Требования: {requirements}"
-                          for vacancy_id,
-                          employer_id,
-                          position,
-                          link,
-                          bottom_salary,
-                          top_salary,
-                          currency, gross, responsibilities, requirements in cursor.fetchall()])
-
-    def get_vacancies_with_keyword(self, cursor, keyword: str):
-        """Method for getting list of vacancies using keyword."""
-        result = cursor.execute(f"SELECT name, link, responsibilities, requirements FROM vacancies "
-                                f"WHERE name LIKE '%{keyword.title()}%'")
-        return "\n".join([f"Должность: {position}, "
-                          f"Ссылка: {link}, "
-                          f"Обязанности: {responsibilities}, "
-                          f"Требования: {requirements}"
-                          for position, link, responsibilities, requirements in cursor.fetchall()])
+        return self._iter_rows(cursor, "get_vacancies_with_higher_salary",
+                               f"""SELECT vacancy_id, employer_id, name, link, bottom_salary, top_salary,
+                                   currency, gross, responsibilities, requirements, top_salary_net
+                                   FROM vacancies
+                                   WHERE is_active AND top_salary_net > (SELECT avg_salary FROM salary_overall)
+                                   {self._after("top_salary_net, vacancy_id", after)}
+                                   ORDER BY top_salary_net DESC, vacancy_id DESC
+                                   LIMIT %(limit)s""",
+                               {"after": after, "limit": limit}, VacancyDetailsRow)
+
+    def get_vacancies_with_keyword(self, cursor, keyword: str, limit: int = 20,
+                                   after: tuple = None) -> Iterator[KeywordVacancyRow]:
+        """Method for full-text search of vacancies ranked by relevance, with substring matches by name."""
+        pattern = "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        # ts_rank returns real; as float8 the rank read back into keyset position compares equal to itself.
+        return self._iter_rows(cursor, "get_vacancies_with_keyword",
+                               f"""SELECT * FROM (
+                                       SELECT vacancy_id, name, link, responsibilities, requirements,
+                                              ts_rank(search_vector, query)::float8 AS rank
+                                       FROM vacancies, websearch_to_tsquery('russian', %(keyword)s) AS query
+                                       WHERE is_active AND (search_vector @@ query OR name ILIKE %(pattern)s)
+                                   ) AS found
+                                   WHERE TRUE {self._after("rank, vacancy_id", after)}
+                                   ORDER BY rank DESC, vacancy_id DESC
+                                   LIMIT %(limit)s""",
+                               {"keyword": keyword, "pattern": pattern, "after": after, "limit": limit},
+                               KeywordVacancyRow)
+
+    def get_salary_stats(self, cursor, by: str = "title", limit: int = 15,
+                         after: tuple = None) -> Iterator[SalaryStatsRow]:
+        """Method for getting mean, median and percentiles of normalized salary per title or per employer."""
+        group = {"title": "vacancies.name", "employer": "employers.name"}[by]
+        # Vacancies of anonymous employers have no employer row, but are counted in per-title stats.
+        join = "JOIN employers ON vacancies.employer_id = employers.id" if by == "employer" else ""
+        return self._iter_rows(cursor, "get_salary_stats",
+                               f"""SELECT * FROM (
+                                       SELECT {group} AS group_name, COUNT(*) AS total_vacancies,
+                                       AVG(salary)::numeric(12,2) AS mean,
+                                       percentile_cont(0.5) WITHIN GROUP (ORDER BY salary)::numeric(12,2)
+                                           AS median,
+                                       percentile_cont(0.25) WITHIN GROUP (ORDER BY salary)::numeric(12,2)
+                                           AS p25,
+                                       percentile_cont(0.75) WITHIN GROUP (ORDER BY salary)::numeric(12,2)
+                                           AS p75,
+                                       percentile_cont(0.9) WITHIN GROUP (ORDER BY salary)::numeric(12,2)
+                                           AS p90
+                                       FROM (SELECT employer_id, name,
+                                                    (COALESCE(bottom_salary_net, top_salary_net) +
+                                                     COALESCE(top_salary_net, bottom_salary_net)) / 2 AS salary
+                                             FROM vacancies
+                                             WHERE is_active
+                                             AND COALESCE(bottom_salary_net, top_salary_net) IS NOT NULL
+                                             ) AS vacancies
+                                       {join}
+                                       GROUP BY {group}
+                                   ) AS stats
+                                   WHERE TRUE {self._after("median, COALESCE(group_name, '')", after)}
+                                   ORDER BY median DESC, COALESCE(group_name, '') DESC
+                                   LIMIT %(limit)s""",
+                               {"after": self._keyset(after), "limit": limit}, SalaryStatsRow)
+
+    def get_snapshots(self, cursor, limit: int = 15, after: tuple = None) -> Iterator[SnapshotRow]:
+        """Method for getting recorded snapshots, newest first."""
+        return self._iter_rows(cursor, "get_snapshots",
+                               f"""SELECT snapshot_id, taken_at, vacancies FROM snapshots
+                                   WHERE TRUE {self._after("snapshot_id", after)}
+                                   ORDER BY snapshot_id DESC
+                                   LIMIT %(limit)s""",
+                               {"after": after, "limit": limit}, SnapshotRow)
+
+    @staticmethod
+    def _snapshots(cursor, since: int, until: int = None) -> dict:
+        """Returns ids and dates of the compared snapshots; until defaults to the latest snapshot.
+
+        Dates are passed to diff queries as constants, so that the planner prunes all other partitions.
+        """
+        cursor.execute("SELECT snapshot_id, taken_at FROM snapshots WHERE snapshot_id IN (%s, "
+                       "COALESCE(%s, (SELECT max(snapshot_id) FROM snapshots)))", (since, until))
+        found = dict(cursor.fetchall())
+        until = until if until is not None else max(found, default=None)
+        for snapshot_id in (since, until):
+            if snapshot_id not in found:
+                raise ValueError(f"Snapshot {snapshot_id} is not found")
+        return {"since": since, "since_at": found[since], "until": until, "until_at": found[until]}
+
+    def _diff(self, cursor, method: str, present: str, absent: str, since: int, until: int | None, limit: int | None,
+              after: tuple | None) -> Iterator[HistoryVacancyRow]:
+        """Streams vacancies of the present snapshot that are missing from the absent one."""
+        return self._iter_rows(cursor, method,
+                               f"""SELECT present.hh_vacancy_id, present.employer_id, vacancies.name, vacancies.link,
+                                   present.bottom_salary_net, present.top_salary_net
+                                   FROM vacancy_history AS present
+                                   JOIN vacancies ON vacancies.hh_vacancy_id = present.hh_vacancy_id
+                                   WHERE present.snapshot_id = %({present})s AND present.taken_at = %({present}_at)s
+                                   AND NOT EXISTS (
+                                       SELECT 1 FROM vacancy_history AS absent
+                                       WHERE absent.snapshot_id = %({absent})s AND absent.taken_at = %({absent}_at)s
+                                       AND absent.hh_vacancy_id = present.hh_vacancy_id)
+                                   {self._after("present.hh_vacancy_id", after)}
+                                   ORDER BY present.hh_vacancy_id DESC
+                                   LIMIT %(limit)s""",
+                               {**self._snapshots(cursor, since, until), "after": after, "limit": limit},
+                               HistoryVacancyRow)
+
+    def get_new_vacancies(self, cursor, since: int, until: int = None, limit: int = None,
+                          after: tuple = None) -> Iterator[HistoryVacancyRow]:
+        """Method for getting vacancies that appeared after snapshot since, up to snapshot until or the latest."""
+        return self._diff(cursor, "get_new_vacancies", "until", "since", since, until, limit, after)
+
+    def get_closed_vacancies(self, cursor, since: int, until: int = None, limit: int = None,
+                             after: tuple = None) -> Iterator[HistoryVacancyRow]:
+        """Method for getting vacancies of snapshot since that are closed by snapshot until or the latest."""
+        return self._diff(cursor, "get_closed_vacancies", "since", "until", since, until, limit, after)
+
+    def get_salary_changes(self, cursor, since: int, until: int = None, limit: int = None,
+                           after: tuple = None) -> Iterator[SalaryChangeRow]:
+        """Method for getting vacancies whose normalized salary changed between the snapshots."""
+        return self._iter_rows(cursor, "get_salary_changes",
+                               f"""SELECT present.hh_vacancy_id, vacancies.name, vacancies.link,
+                                   previous.bottom_salary_net, previous.top_salary_net,
+                                   present.bottom_salary_net, present.top_salary_net
+                                   FROM vacancy_history AS present
+                                   JOIN vacancy_history AS previous
+                                   ON previous.snapshot_id = %(since)s AND previous.taken_at = %(since_at)s
+                                   AND previous.hh_vacancy_id = present.hh_vacancy_id
+                                   JOIN vacancies ON vacancies.hh_vacancy_id = present.hh_vacancy_id
+                                   WHERE present.snapshot_id = %(until)s AND present.taken_at = %(until_at)s
+                                   AND (previous.bottom_salary_net, previous.top_salary_net)
+                                       IS DISTINCT FROM (present.bottom_salary_net, present.top_salary_net)
+                                   {self._after("present.hh_vacancy_id", after)}
+                                   ORDER BY present.hh_vacancy_id DESC
+                                   LIMIT %(limit)s""",
+                               {**self._snapshots(cursor, since, until), "after": after, "limit": limit},
+                               SalaryChangeRow)
 
 
 class DataBaseConnector:
@@ -115,9 +269,9 @@ class DataBaseConnector:
         self.cursor = None
 
     def open_connection(self):
-        """Method that connects to specified database."""
+        """Method that borrows connection to specified database from the pool."""
         try:
-            self.connection = psycopg2.connect(dbname=self.db_manager.db_name, **self.db_manager.params)
+            self.connection = self.db_manager.pool.getconn()
             self.cursor = self.connection.cursor()
             print(f"Connection to {self.db_manager.db_name} database is successful")
         except OperationalError as err:
@@ -125,96 +279,205 @@ class DataBaseConnector:
         return self.connection, self.cursor
 
     def close_connection(self):
-        """Method for closing connection to database."""
+        """Method for returning connection to the pool."""
         self.connection.commit()
         self.cursor.close()
-        self.connection.close()
+        self.db_manager.pool.putconn(self.connection)
 
     @staticmethod
     def create_database(database_name: str, params: dict):
-        """Method for creating database."""
+        """Method for creating database if it is missing and migrating its schema."""
         try:
             connection = psycopg2.connect(dbname="postgres", **params)
             connection.autocommit = True
             cursor = connection.cursor()
-            cursor.execute(f"DROP DATABASE IF EXISTS {database_name}")
-            cursor.execute(f"CREATE DATABASE {database_name}")
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (database_name,))
+            if cursor.fetchone() is None:
+                cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(database_name)))
             connection.close()
 
-            connection = psycopg2.connect(dbname=database_name, **params)
-            cursor = connection.cursor()
-            cursor.execute("""CREATE TABLE employers (
-                            id INT PRIMARY KEY,
-                            name VARCHAR(100),
-                            link VARCHAR(100),
-                            address VARCHAR(100) 
-                           )""")
-
-            cursor.execute("""CREATE TABLE vacancies (
-                            vacancy_id SERIAL PRIMARY KEY,
-                            employer_id INT,
-                            name VARCHAR(100),
-                            link VARCHAR(100),
-                            bottom_salary INT DEFAULT NULL,
-                            top_salary INT DEFAULT NULL,
-                            currency VARCHAR(10) DEFAULT NULL,
-                            gross BOOLEAN DEFAULT NULL,
-                            responsibilities TEXT,
-                            requirements TEXT,
-                            CONSTRAINT fk_employer_id FOREIGN KEY(employer_id) REFERENCES employers(id)
-                            )""")
-            connection.commit()
-            cursor.close()
-            connection.close()
+            with ConnectionPool.get(database_name, params).cursor() as cursor:
+                migrate(cursor)
         except OperationalError as err:
             print(f"The error '{err}' occurred")
 
     @staticmethod
-    def fill_employers(vacancies: list, database_name: str, params: dict):
-        """Method for filling employers table."""
-        connection = psycopg2.connect(dbname=database_name, **params)
-        cursor = connection.cursor()
-        company_names = set()
-        for vacancy in vacancies:
-            if vacancy[VacancyFields.EMPLOYER_INFO.value].name not in company_names:
-                cursor.execute(
-                    f"INSERT INTO employers (id, name, link, address) VALUES "
-                    f"('{vacancy[VacancyFields.EMPLOYER_INFO.value].employer_id}', "
-                    f"'{vacancy[VacancyFields.EMPLOYER_INFO.value].name}', "
-                    f"'{vacancy[VacancyFields.EMPLOYER_INFO.value].url}', "
-                    f"'{vacancy[VacancyFields.ADDRESS.value]}')")
-            company_names.add(vacancy[VacancyFields.EMPLOYER_INFO.value].name)
-        connection.commit()
-        cursor.close()
-        connection.close()
-
-    @staticmethod
-    def fill_vacancies(vacancies: list, database_name: str, params: dict):
-        """Method for filling vacancies table."""
-        connection = psycopg2.connect(dbname=database_name, **params)
-        cursor = connection.cursor()
+    def _report_load(table: str, rows: int, started_at: float):
+        """Prints number of loaded rows and load speed."""
+        elapsed = time.perf_counter() - started_at
+        speed = rows / elapsed if elapsed else float(rows)
+        metrics.observe("load_seconds", elapsed, table=table)
+        print(f"Loaded {rows} rows into {table} in {elapsed:.2f} s ({speed:.0f} rows/sec)")
+
+    @staticmethod
+    def _upsert_employers(cursor, vacancies: list[VacancyRecord], batch_size: int = BATCH_SIZE) -> int:
+        """Upserts employers of the vacancies using given cursor and returns number of rows."""
+        rows = {}
         for vacancy in vacancies:
-            if vacancy[VacancyFields.PAY.value] == "Зарплата не указана":
-                cursor.execute(
-                    f"INSERT INTO vacancies (employer_id, name, link, responsibilities, requirements) VALUES "
-                    f"('{vacancy[VacancyFields.EMPLOYER_INFO.value].employer_id}', "
-                    f"'{vacancy[VacancyFields.NAME.value]}', "
-                    f"'{vacancy[VacancyFields.LINK.value]}', "
-                    f"'{vacancy[VacancyFields.DESCRIPTION.value].responsibility}', "
-                    f"'{vacancy[VacancyFields.DESCRIPTION.value].requirement}')")
-            else:
-                cursor.execute(
-                    f"INSERT INTO vacancies "
-                    f"(employer_id, name, link, bottom_salary, top_salary, currency, gross, responsibilities, requirements) "
-                    f"VALUES ('{vacancy[VacancyFields.EMPLOYER_INFO.value].employer_id}', "
-                    f"'{vacancy[VacancyFields.NAME.value]}', "
-                    f"'{vacancy[VacancyFields.LINK.value]}', "
-                    f"{vacancy[VacancyFields.PAY.value].bottom_salary}, "
-                    f"{vacancy[VacancyFields.PAY.value].top_salary}, "
-                    f"'{vacancy[VacancyFields.PAY.value].currency}', "
-                    f"'{vacancy[VacancyFields.PAY.value].gross}', "
-                    f"'{vacancy[VacancyFields.DESCRIPTION.value].responsibility}', "
-                    f"'{vacancy[VacancyFields.DESCRIPTION.value].requirement}')")
-        connection.commit()
-        cursor.close()
-        connection.close()
+            if vacancy.employer_id is not None and vacancy.employer_id not in rows:
+                rows[vacancy.employer_id] = (vacancy.employer_id,
+                                             vacancy.employer_name,
+                                             vacancy.employer_url,
+                                             vacancy.employer_area,
+                                             vacancy.employer_site_url,
+                                             vacancy.employer_description)
+        execute_values(cursor,
+                       "INSERT INTO employers (id, name, link, address, site_url, description) VALUES %s "
+                       "ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name, link = EXCLUDED.link, "
+                       "address = COALESCE(EXCLUDED.address, employers.address), "
+                       "site_url = COALESCE(EXCLUDED.site_url, employers.site_url), "
+                       "description = COALESCE(EXCLUDED.description, employers.description)",
+                       list(rows.values()),
+                       page_size=batch_size)
+        return len(rows)
+
+    @staticmethod
+    def _upsert_vacancies(cursor, vacancies: list[VacancyRecord], batch_size: int = BATCH_SIZE) -> int:
+        """Upserts vacancies using given cursor and returns number of rows."""
+        started_at = time.perf_counter()
+        rows = {vacancy.vacancy_id: (vacancy.vacancy_id,
+                                     vacancy.employer_id,
+                                     vacancy.name,
+                                     vacancy.link,
+                                     vacancy.bottom_salary,
+                                     vacancy.top_salary,
+                                     vacancy.currency,
+                                     vacancy.gross,
+                                     vacancy.responsibility,
+                                     vacancy.requirement,
+                                     vacancy.bottom_salary_net,
+                                     vacancy.top_salary_net,
+                                     vacancy.address,
+                                     vacancy.description)
+                for vacancy in vacancies}
+        execute_values(cursor,
+                       "INSERT INTO vacancies "
+                       "(hh_vacancy_id, employer_id, name, link, bottom_salary, top_salary, currency, gross, "
+                       "responsibilities, requirements, bottom_salary_net, top_salary_net, address, description) "
+                       "VALUES %s "
+                       "ON CONFLICT (hh_vacancy_id) DO UPDATE SET employer_id = EXCLUDED.employer_id, "
+                       "name = EXCLUDED.name, link = EXCLUDED.link, bottom_salary = EXCLUDED.bottom_salary, "
+                       "top_salary = EXCLUDED.top_salary, currency = EXCLUDED.currency, gross = EXCLUDED.gross, "
+                       "responsibilities = EXCLUDED.responsibilities, requirements = EXCLUDED.requirements, "
+                       "bottom_salary_net = EXCLUDED.bottom_salary_net, top_salary_net = EXCLUDED.top_salary_net, "
+                       "address = EXCLUDED.address, "
+                       "description = COALESCE(EXCLUDED.description, vacancies.description), "
+                       "is_active = TRUE, closed_at = NULL, updated_at = now()",
+                       list(rows.values()),
+                       page_size=batch_size)
+        metrics.observe("load_batch_seconds", time.perf_counter() - started_at, table="vacancies")
+        metrics.inc("rows_upserted_total", len(rows), table="vacancies")
+        return len(rows)
+
+    @staticmethod
+    def _lock_loads(cursor):
+        """Waits until other loads commit; holds the lock until the end of the transaction.
+
+        Loads of overlapping watchlists upsert the same employers and vacancies in different order, so running
+        them concurrently leads to deadlocks and long lock waits. Streaming loads take the lock only when their
+        first batch is ready, so a pipeline waiting for it has already fetched and parsed that batch; the rest
+        of its crawl streams under the lock.
+        """
+        started_at = time.perf_counter()
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('vacancies_load'))")
+        metrics.observe("load_lock_wait_seconds", time.perf_counter() - started_at)
+
+    @staticmethod
+    def _deactivate_missing(cursor):
+        """Closes active vacancies that were not upserted in the current transaction."""
+        cursor.execute("""UPDATE vacancies SET is_active = FALSE, closed_at = now(), updated_at = now()
+                          WHERE is_active AND updated_at < now()""")
+        print(f"Closed {cursor.rowcount} vacancies missing from the load")
+
+    @staticmethod
+    def refresh_aggregates(cursor):
+        """Refreshes aggregate materialized views without blocking their readers."""
+        for view in AGGREGATE_VIEWS:
+            cursor.execute(sql.SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY {}").format(sql.Identifier(view)))
+
+    @staticmethod
+    def record_snapshot(cursor) -> int:
+        """Copies active vacancies into vacancy history as a new snapshot and drops expired history."""
+        # Loads running at the same time must not create the same partition concurrently.
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('vacancy_history'))")
+        cursor.execute("INSERT INTO snapshots (taken_at) VALUES (now()) RETURNING snapshot_id, taken_at")
+        snapshot_id, taken_at = cursor.fetchone()
+        ensure_history_partition(cursor, taken_at)
+        cursor.execute("""INSERT INTO vacancy_history
+                          (snapshot_id, taken_at, hh_vacancy_id, employer_id, bottom_salary_net, top_salary_net)
+                          SELECT %s, %s, hh_vacancy_id, employer_id, bottom_salary_net, top_salary_net
+                          FROM vacancies
+                          WHERE is_active""", (snapshot_id, taken_at))
+        rows = cursor.rowcount
+        cursor.execute("UPDATE snapshots SET vacancies = %s WHERE snapshot_id = %s", (rows, snapshot_id))
+        for partition in drop_expired_history(cursor, taken_at):
+            print(f"Dropped expired history partition {partition}")
+        metrics.inc("rows_upserted_total", rows, table="vacancy_history")
+        print(f"Recorded snapshot {snapshot_id} with {rows} active vacancies")
+        return snapshot_id
+
+    @staticmethod
+    def _finish_load(cursor, deactivate_missing: bool = False):
+        """Refreshes aggregates and bumps load generation; full load also closes missing vacancies and takes snapshot.
+
+        Partial loads, e.g. of daemon watchlists, do not show which vacancies were closed, so they take no snapshot.
+        """
+        if deactivate_missing:
+            DataBaseConnector._deactivate_missing(cursor)
+        DataBaseConnector.refresh_aggregates(cursor)
+        if deactivate_missing:
+            DataBaseConnector.record_snapshot(cursor)
+        cursor.execute("UPDATE load_generation SET generation = generation + 1, loaded_at = now()")
+
+    @staticmethod
+    def fill_employers(vacancies: list[VacancyRecord], database_name: str, params: dict, batch_size: int = BATCH_SIZE):
+        """Method for filling employers table."""
+        started_at = time.perf_counter()
+        with ConnectionPool.get(database_name, params).cursor() as cursor:
+            DataBaseConnector._lock_loads(cursor)
+            rows = DataBaseConnector._upsert_employers(cursor, vacancies, batch_size)
+        DataBaseConnector._report_load("employers", rows, started_at)
+
+    @staticmethod
+    def fill_vacancies(vacancies: list[VacancyRecord], database_name: str, params: dict, batch_size: int = BATCH_SIZE,
+                       deactivate_missing: bool = False):
+        """Method for upserting vacancies; with deactivate_missing closes vacancies absent from the load."""
+        started_at = time.perf_counter()
+        with ConnectionPool.get(database_name, params).cursor() as cursor:
+            DataBaseConnector._lock_loads(cursor)
+            rows = DataBaseConnector._upsert_vacancies(cursor, vacancies, batch_size)
+            DataBaseConnector._finish_load(cursor, deactivate_missing)
+        DataBaseConnector._report_load("vacancies", rows, started_at)
+
+    @staticmethod
+    def load(vacancies: list[VacancyRecord], database_name: str, params: dict, batch_size: int = BATCH_SIZE,
+             deactivate_missing: bool = False):
+        """Method for loading employers and vacancies in a single transaction."""
+        DataBaseConnector.load_stream([vacancies], database_name, params, batch_size, deactivate_missing)
+
+    @staticmethod
+    def load_stream(batches: Iterable[list[VacancyRecord]], database_name: str, params: dict,
+                    batch_size: int = BATCH_SIZE, deactivate_missing: bool | Callable[[], bool] = False) -> int:
+        """Method for loading batches of vacancies as they arrive in a single transaction.
+
+        deactivate_missing may be a callable: it is evaluated after the last batch, so that a streaming source
+        can cancel deactivation when it turned out to be incomplete.
+        """
+        started_at = time.perf_counter()
+        rows = 0
+        locked = False
+        with ConnectionPool.get(database_name, params).cursor() as cursor:
+            # A lazy source, e.g. the pipeline, starts fetching only when the first batch is requested.
+            for vacancies in batches:
+                if not locked:
+                    DataBaseConnector._lock_loads(cursor)
+                    locked = True
+                DataBaseConnector._upsert_employers(cursor, vacancies, batch_size)
+                rows += DataBaseConnector._upsert_vacancies(cursor, vacancies, batch_size)
+            if callable(deactivate_missing):
+                deactivate_missing = deactivate_missing()
+            if not locked:
+                DataBaseConnector._lock_loads(cursor)
+            DataBaseConnector._finish_load(cursor, deactivate_missing)
+        DataBaseConnector._report_load("vacancies", rows, started_at)
+        return rows
@@ -0,0 +1,101 @@
+"""
+Module for enriching searched vacancies with full descriptions and employer profiles.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable, Iterator
+from src.cache import DetailCache
+from src.metrics import metrics
+from src.parser import BaseApiConnector, HHApiConnector, log_error
+from src.resilience import RequestFailed
+
+DETAIL_FIELDS: dict[str, tuple[str, ...]] = {"vacancies": ("description",),
+                                             "employers": ("description", "site_url", "area")}
+
+
+class Enricher(BaseApiConnector):
+    """Connector wrapper adding full description to every vacancy and profile of its employer.
+
+    Details are requested concurrently through the API connector, so they share its rate limiter, retries
+    and circuit breaker. Concurrent requests of the same record share one future, fetched records are kept
+    in the detail cache: vacancy is refetched when its published_at changes (hh.ru bumps it when vacancy is
+    edited and republished), employer when its cache entry expires.
+    """
+
+    def __init__(self, source: BaseApiConnector, api: HHApiConnector, cache: DetailCache = None,
+                 concurrency: int = None):
+        self.source = source
+        self.api = api
+        self.cache = cache or DetailCache(":memory:")
+        self.concurrency = concurrency or api.concurrency
+        api.reserve_connections(self.concurrency)
+        self.base_url = api.url.rsplit("/", 1)[0]
+        self.vacancies = []
+        self._in_flight: dict[tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, kind: str, record_id: str, version: str | None) -> dict[str, Any] | None:
+        """Requests details of the record and caches their used fields; returns None if request failed."""
+        try:
+            body = self.api._request(f"{self.base_url}/{kind}/{record_id}")
+            details = {field: body.get(field) for field in DETAIL_FIELDS[kind]}
+            self.cache.set(kind, record_id, version, details)
+            metrics.inc("enrichment_fetched_total", kind=kind)
+            return details
+        except RequestFailed as err:
+            log_error(f"Details of {kind} {record_id} are skipped: {err}")
+            return None
+        finally:
+            with self._lock:
+                del self._in_flight[(kind, record_id)]
+
+    def _submit(self, executor: ThreadPoolExecutor, kind: str, record_id: str, version: str = None) -> Future:
+        """Returns future of the record details, reusing requests in flight and cached records."""
+        key = (kind, record_id)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                metrics.inc("enrichment_deduplicated_total", kind=kind)
+                return future
+            cached = self.cache.get(kind, record_id, version)
+            if cached is not None:
+                metrics.inc("enrichment_cache_hits_total", kind=kind)
+                future = Future()
+                future.set_result(cached)
+                return future
+            future = self._in_flight[key] = executor.submit(self._fetch, kind, record_id, version)
+            return future
+
+    def _enrich(self, executor: ThreadPoolExecutor, items: list[dict]) -> list[dict]:
+        """Adds "description" and "employer_details" to vacancies of the page in place and returns the page."""
+        vacancy_details = [self._submit(executor, "vacancies", item["id"], item.get("published_at"))
+                           for item in items]
+        employer_details = {}
+        for item in items:
+            employer_id = (item.get("employer") or {}).get("id")
+            if employer_id and employer_id not in employer_details:
+                employer_details[employer_id] = self._submit(executor, "employers", employer_id)
+        for item, future in zip(items, vacancy_details):
+            details = future.result()
+            if details:
+                item["description"] = details["description"]
+            employer_id = (item.get("employer") or {}).get("id")
+            if employer_id and (profile := employer_details[employer_id].result()):
+                item["employer_details"] = profile
+        return items
+
+    def iter_pages(self) -> Iterator[list[dict]]:
+        """Yields pages of the source connector with details of their vacancies and employers."""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for items in self.source.iter_pages():
+                yield self._enrich(executor, items)
+
+    def update_watermark(self, vacancies: Iterable[dict]):
+        self.source.update_watermark(vacancies)
+
+    def _get_data(self) -> list[dict]:
+        """Extract enriched data of the source connector."""
+        for items in self.iter_pages():
+            self.vacancies.extend(items)
+        return self.vacancies
@@ -0,0 +1,80 @@
+"""
+Module for formatting rows returned by data managers as human-readable text.
+"""
+
+from typing import Iterable
+from src.rows import (AverageSalaryRow, CompanyVacanciesRow, HistoryVacancyRow, KeywordVacancyRow, SalaryChangeRow,
+                      SalaryStatsRow, SnapshotRow, VacancyDetailsRow, VacancyRow)
+
+
+def format_company_vacancies(row: CompanyVacanciesRow) -> str:
+    return f"Компания: {row.name}, количество вакансий: {row.total_vacancies}"
+
+
+def format_vacancy(row: VacancyRow) -> str:
+    return (f"Компания: {row.employer_name}, "
+            f"Должность {row.name}, "
+            f"Зарплата до: {row.top_salary}, "
+            f"Ссылка: {row.link}")
+
+
+def format_average_salary(row: AverageSalaryRow) -> str:
+    return f"Должность: {row.name}, Средняя зарплата: {row.avg_salary} {row.currency}"
+
+
+def format_vacancy_details(row: VacancyDetailsRow) -> str:
+    return (f"id: {row.vacancy_id}, "
+            f"employer_id: {row.employer_id}, "
+            f"Должность: {row.name}, "
+            f"Ссылка: {row.link}, "
+            f"Зарплата от {row.bottom_salary} до {row.top_salary},"
+            f"Валюта: {row.currency},"
+            f"До вычета налогов {row.gross},"
+            f"Обязанности: {row.responsibilities},"
+            f"Требования: {row.requirements}")
+
+
+def format_keyword_vacancy(row: KeywordVacancyRow) -> str:
+    return (f"Должность: {row.name}, "
+            f"Ссылка: {row.link}, "
+            f"Обязанности: {row.responsibilities}, "
+            f"Требования: {row.requirements}")
+
+
+def format_salary_stats(row: SalaryStatsRow) -> str:
+    return (f"{row.group_name}: вакансий {row.total_vacancies}, средняя {row.mean}, медиана {row.median}, "
+            f"p25 {row.p25}, p75 {row.p75}, p90 {row.p90}")
+
+
+def format_snapshot(row: SnapshotRow) -> str:
+    return f"Снимок {row.snapshot_id} от {row.taken_at:%Y-%m-%d %H:%M}, активных вакансий: {row.vacancies}"
+
+
+def format_history_vacancy(row: HistoryVacancyRow) -> str:
+    return (f"Должность: {row.name}, "
+            f"Ссылка: {row.link}, "
+            f"Зарплата от {row.bottom_salary_net} до {row.top_salary_net}")
+
+
+def format_salary_change(row: SalaryChangeRow) -> str:
+    return (f"Должность: {row.name}, "
+            f"Ссылка: {row.link}, "
+            f"Зарплата: от {row.old_bottom_salary_net} до {row.old_top_salary_net} -> "
+            f"от {row.bottom_salary_net} до {row.top_salary_net}")
+
+
+FORMATTERS = {CompanyVacanciesRow: format_company_vacancies,
+              VacancyRow: format_vacancy,
+              AverageSalaryRow: format_average_salary,
+              VacancyDetailsRow: format_vacancy_details,
+              KeywordVacancyRow: format_keyword_vacancy,
+              SalaryStatsRow: format_salary_stats,
+              SnapshotRow: format_snapshot,
+              HistoryVacancyRow: format_history_vacancy,
+              SalaryChangeRow: format_salary_change}
+
+
+def print_rows(rows: Iterable[tuple]):
+    """Prints rows one by one as they arrive."""
+    for row in rows:
+        print(FORMATTERS[type(row)](row))
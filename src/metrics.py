@@ -0,0 +1,225 @@
+"""
+Module for collecting stage-level metrics and profiles of the pipeline.
+
+Metrics are kept in process-wide `metrics` registry and can be logged as structured records,
+written in Prometheus text format or served over HTTP.
+"""
+
+import cProfile
+import os
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, suppress
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Iterator, TypeVar
+from loguru import logger
+
+T = TypeVar("T")
+_EXHAUSTED = object()
+THREAD_NAME_PATTERN = re.compile(r"[^\w-]+")
+LATENCY_BUCKETS: tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels_key(labels: dict[str, str]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...], extra: dict[str, str] = None) -> str:
+    pairs = list(labels) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative histogram of observed values."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+
+class Metrics:
+    """Thread-safe registry of counters and histograms."""
+
+    def __init__(self):
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._lock = threading.Lock()
+        self.profile_directory = None
+        self._profiles: dict[tuple[str, str], cProfile.Profile] = {}
+        self._active_profiles = threading.local()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increases counter."""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Records observation of histogram, e.g. duration in seconds."""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._histograms.setdefault(key, Histogram()).observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observes duration of the block in seconds."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started_at, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def to_prometheus(self) -> str:
+        """Returns metrics in Prometheus text exposition format."""
+        lines = []
+        typed = set()
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"{name}_bucket{_format_labels(labels, {'le': str(bound)})} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, {'le': '+Inf'})} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Writes metrics to file in Prometheus text format."""
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+        os.replace(temporary_path, path)
+
+    def serve_prometheus(self, port: int) -> ThreadingHTTPServer:
+        """Serves metrics on http://0.0.0.0:port/metrics from background thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200 if self.path == "/metrics" else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def log_summary(self):
+        """Logs every metric as structured record."""
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(key, histogram.count, histogram.sum) for key, histogram in self._histograms.items()]
+        for (name, labels), value in counters:
+            logger.bind(metric=name, value=value, **dict(labels)).info(f"{name}{_format_labels(labels)} = {value}")
+        for (name, labels), count, total in histograms:
+            average = total / count if count else 0.0
+            logger.bind(metric=name, count=count, sum=total, avg=average, **dict(labels)).info(
+                f"{name}{_format_labels(labels)}: count={count} sum={total:.3f}s avg={average:.4f}s")
+
+    def enable_profiling(self, directory: str):
+        """Starts tracing allocations and collecting cProfile output of stages; see write_profiles."""
+        os.makedirs(directory, exist_ok=True)
+        self.profile_directory = directory
+        tracemalloc.start()
+
+    @contextmanager
+    def profile(self, stage: str):
+        """Adds the block to cProfile output of the stage when profiling is enabled.
+
+        Every stage is profiled in the thread running it. The block may be entered many times, e.g. for every
+        parsed page, and the profile of the enclosing stage is paused meanwhile. Since Python 3.12 only one
+        profiler can be active in the process, so a block entered while a stage of another thread is profiled
+        is skipped.
+        """
+        if not self.profile_directory:
+            yield
+            return
+        with self._lock:
+            profiler = self._profiles.setdefault((stage, threading.current_thread().name), cProfile.Profile())
+        stack = self._active_profiles.__dict__.setdefault("stack", [])
+        if stack and stack[-1] is not None:
+            stack[-1].disable()
+        try:
+            profiler.enable()
+        except ValueError:
+            self.inc("profile_blocks_skipped_total", stage=stage)
+            profiler = None
+        stack.append(profiler)
+        try:
+            yield
+        finally:
+            stack.pop()
+            if profiler is not None:
+                profiler.disable()
+            if stack and stack[-1] is not None:
+                with suppress(ValueError):
+                    stack[-1].enable()
+
+    def profile_iter(self, stage: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yields items of the iterable, profiling production of every item as part of the stage."""
+        iterator = iter(iterable)
+        while True:
+            with self.profile(stage):
+                item = next(iterator, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                return
+            yield item
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Times the stage and profiles it when profiling is enabled."""
+        with self.timer("stage_seconds", stage=stage), self.profile(stage):
+            yield
+
+    def write_profiles(self):
+        """Dumps cProfile output of every profiled stage and top allocations of the process."""
+        if not self.profile_directory:
+            return
+        with self._lock:
+            profiles = list(self._profiles.items())
+        threads_per_stage = Counter(stage for (stage, _), _ in profiles)
+        for (stage, thread), profiler in profiles:
+            # A stage run by several threads, e.g. by daemon workers, gets one profile per thread.
+            name = stage if threads_per_stage[stage] == 1 else f"{stage}.{THREAD_NAME_PATTERN.sub('_', thread)}"
+            profiler.dump_stats(os.path.join(self.profile_directory, f"{name}.prof"))
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            with open(os.path.join(self.profile_directory, "tracemalloc.txt"), "w", encoding="utf-8") as file:
+                for statistic in snapshot.statistics("lineno")[:50]:
+                    file.write(f"{statistic}\n")
+
+
+metrics = Metrics()
@@ -1,8 +1,31 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Iterable, Iterator
+import time
 import requests
 from loguru import logger
-from requests.exceptions import HTTPError
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, HTTPError, Timeout
+from src.cache import ResponseCache
+from src.metrics import metrics
+from src.resilience import CircuitBreaker, CrawlIncomplete, RequestFailed, RetryPolicy, TokenBucket
+
+_error_log_configured = False
+
+
+def log_error(message: str):
+    """Writes error both to console and to the errors log, adding the log sink only once."""
+    global _error_log_configured
+    if not _error_log_configured:
+        logger.add(
+            "../errors_logs/errors.log",
+            level="ERROR",
+            format="{time} {level} {message}",
+        )
+        _error_log_configured = True
+    print(message)
+    logger.error(message)
 
 
 class BaseAPIManager(ABC):
@@ -12,12 +35,24 @@ class BaseAPIManager(ABC):
         pass
 
 
+def published_at(vacancy: dict[str, Any]) -> datetime:
+    """Returns publication date of raw vacancy."""
+    return datetime.strptime(vacancy["published_at"], HHApiConnector._published_format)
+
+
 class BaseApiConnector(ABC):
 
     @abstractmethod
     def _get_data(self) -> list[dict]:
         pass
 
+    def iter_pages(self) -> Iterator[list[dict]]:
+        """Yields pages of vacancies; connectors that can stream override it."""
+        yield self._get_data()
+
+    def update_watermark(self, vacancies: Iterable[dict]):
+        """Advances incremental sync watermark; no-op for connectors without one."""
+
 
 class APIManager(BaseAPIManager):
     """API connection manager."""
@@ -36,49 +71,219 @@ class HHApiConnector(BaseApiConnector):
     _url: str = "https://api.hh.ru/vacancies"
     _headers: dict[str, str] = {"User-Agent": "api-test-agent"}
     _params: dict[str, Any] = {"text": " ", "page": 0, "per_page": 100}
+    _max_pages: int = 20
+    _published_format: str = "%Y-%m-%dT%H:%M:%S%z"
+    _keyword: str = "Программист"
+    _employers_id: list[str] = ['5124731',
+                                '907345',
+                                "239363",
+                                "4813742",
+                                "5060211",
+                                "78638",
+                                "80",
+                                "3529",
+                                "1740",
+                                "41144",
+                                "4118",
+                                "6093775",
+                                "39305"]
 
-    def __init__(self):
+    def __init__(self, concurrency: int = 5, timeout: int = 90, keyword: str = None, employers_id: list[str] = None,
+                 rate_limiter: TokenBucket = None, retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None, cache: ResponseCache = None, incremental: bool = False,
+                 archive=None, url: str = None, areas: list[str] = None, sweep_interval: float = 24 * 3600):
         self.vacancies = []
+        self.keyword = keyword or HHApiConnector._keyword
+        self.employers_id = employers_id or HHApiConnector._employers_id
+        self.areas = areas or []
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.pool_size = self.concurrency
+        self.session = self._create_session()
+        self.rate_limiter = rate_limiter or TokenBucket(rate=5, capacity=10)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        if incremental and cache is None:
+            raise ValueError("Incremental sync requires response cache to keep its watermark")
+        self.cache = cache
+        self.incremental = incremental
+        self.sweep_interval = sweep_interval
+        self._full_period = True
+        self.archive = archive
+        self.url = url or HHApiConnector._url
+        self.failures: list[str] = []
 
-    def _get_data(self) -> list[dict]:
-        """Extract data using specified parameters."""
-        keyword = "Программист"
-        HHApiConnector._params["text"] = keyword.title()
-        employers_id = ['5124731',
-                        '907345',
-                        "239363",
-                        "4813742",
-                        "5060211",
-                        "78638",
-                        "80",
-                        "3529",
-                        "1740",
-                        "41144",
-                        "4118",
-                        "6093775",
-                        "39305"]
-        HHApiConnector._params["employer_id"] = employers_id
-        while HHApiConnector._params.get("page") != 20:
+    def _create_session(self) -> requests.Session:
+        """Returns session with keep-alive connection pool sized for concurrent workers."""
+        session = requests.Session()
+        self._mount_adapter(session)
+        session.headers.update(HHApiConnector._headers)
+        return session
+
+    def _mount_adapter(self, session: requests.Session):
+        # A blocking pool makes extra workers wait for a connection instead of opening and discarding new ones.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    def reserve_connections(self, workers: int):
+        """Grows connection pool for additional workers sharing this connector, e.g. parallel crawl shards."""
+        self.pool_size += workers
+        self._mount_adapter(self.session)
+
+    def _build_params(self) -> dict[str, Any]:
+        """Returns query parameters for the search."""
+        params = dict(HHApiConnector._params)
+        params["text"] = self.keyword.title()
+        params["employer_id"] = self.employers_id
+        if self.areas:
+            params["area"] = self.areas
+        watermark = self.watermark
+        # Incremental syncs request only vacancies published after the watermark, so edits of older ones are
+        # picked up by a periodic sweep of the whole period.
+        self._full_period = not watermark or self.sweep_due
+        if not self._full_period:
+            params["date_from"] = watermark
+        return params
+
+    @property
+    def watermark_name(self) -> str:
+        """Name of the watermark identifying this search and its areas in the cache."""
+        name = f"{self.keyword.title()}:{','.join(sorted(self.employers_id))}"
+        if self.areas:
+            name += f":{','.join(sorted(self.areas))}"
+        return name
+
+    @property
+    def watermark(self) -> str | None:
+        """Publication date of the newest vacancy loaded by the previous incremental sync."""
+        if not self.incremental:
+            return None
+        return self.cache.get_watermark(self.watermark_name)
+
+    @property
+    def sweep_due(self) -> bool:
+        """Whether the next incremental sync should sweep the whole period instead of starting at the watermark."""
+        if not self.incremental:
+            return False
+        swept_at = self.cache.get_watermark(f"{self.watermark_name}:swept_at")
+        return swept_at is None or time.time() - float(swept_at) >= self.sweep_interval
+
+    def update_watermark(self, vacancies: Iterable[dict]):
+        """Advances watermark to the newest publication date; call after vacancies are stored."""
+        if not self.incremental:
+            return
+        if self._full_period:
+            self.cache.set_watermark(f"{self.watermark_name}:swept_at", str(time.time()))
+        newest = max(map(published_at, vacancies), default=None)
+        if newest is None:
+            return
+        current = self.watermark
+        if current and datetime.strptime(current, HHApiConnector._published_format) >= newest:
+            return
+        self.cache.set_watermark(self.watermark_name, newest.strftime(HHApiConnector._published_format))
+
+    @property
+    def results_ceiling(self) -> int:
+        """Maximum number of results that can be reached through pagination."""
+        return HHApiConnector._max_pages * HHApiConnector._params["per_page"]
+
+    def _request(self, url: str, params: dict[str, Any] = None) -> dict[str, Any]:
+        """Performs rate limited GET request with retries, backoff and circuit breaker."""
+        for attempt in range(self.retry_policy.max_retries + 1):
+            self.circuit_breaker.wait()
+            self.rate_limiter.acquire()
+            retry_after = None
+            if attempt:
+                metrics.inc("http_retries_total")
+            started_at = time.perf_counter()
             try:
-                response = requests.get(
-                    url=HHApiConnector._url, params=HHApiConnector._params, timeout=90
-                )
-                response.raise_for_status()
-                vacancies = response.json()["items"]
-                self.vacancies.extend(vacancies)
-                HHApiConnector._params["page"] += 1
+                response = self._conditional_get(url, params)
+                metrics.observe("http_request_seconds", time.perf_counter() - started_at, outcome="ok")
+                self.circuit_breaker.record_success()
+                return response
 
             except HTTPError as http_err:
-                print(f"HTTP error occurred: {http_err}")
-                logger.add(
-                    "../errors_logs/errors.log",
-                    level="ERROR",
-                    format="{time} {level} {message}",
-                )
-                logger.error(f"HTTP error occurred: {http_err}")
-        return self.vacancies
+                if http_err.response.status_code not in RetryPolicy.retry_statuses:
+                    raise RequestFailed(f"HTTP error occurred: {http_err}") from http_err
+                retry_after = http_err.response.headers.get("Retry-After")
+                metrics.observe("http_request_seconds", time.perf_counter() - started_at, outcome="http_error")
+                log_error(f"HTTP error occurred: {http_err}")
+            except (Timeout, ConnectionError) as conn_err:
+                metrics.observe("http_request_seconds", time.perf_counter() - started_at, outcome="connection_error")
+                log_error(f"Connection error occurred: {conn_err}")
+            self.circuit_breaker.record_failure()
+            if attempt < self.retry_policy.max_retries:
+                time.sleep(self.retry_policy.delay(attempt, retry_after))
+        raise RequestFailed(f"Request to {url} failed after {self.retry_policy.max_retries} retries.")
+
+    def _conditional_get(self, url: str, params: dict[str, Any] = None) -> dict[str, Any]:
+        """Sends GET request validated against cached ETag/Last-Modified and returns response body."""
+        if self.cache is None:
+            response = self.session.get(url=url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        key = ResponseCache.make_key(url, params)
+        cached = self.cache.get(key)
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        response = self.session.get(url=url, params=params, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        if response.status_code == 304 and cached:
+            metrics.inc("http_not_modified_total")
+            self.cache.touch(key)
+            return cached[2]
+        body = response.json()
+        self.cache.set(key, response.headers.get("ETag"), response.headers.get("Last-Modified"), body)
+        return body
+
+    def _get_page(self, params: dict[str, Any], page: int) -> dict[str, Any]:
+        """Requests single page of search results, appending it to the archive when one is set."""
+        page_params = {**params, "page": page}
+        body = self._request(self.url, page_params)
+        metrics.inc("pages_fetched_total")
+        if self.archive is not None:
+            self.archive.write(page_params, body)
+        return body
 
+    def _get_page_items(self, params: dict[str, Any], page: int) -> list[dict]:
+        """Returns items of the page; a page whose retry budget is exhausted is skipped and recorded in failures."""
+        try:
+            return self._get_page(params, page)["items"]
+        except RequestFailed as err:
+            log_error(f"Page {page} is skipped: {err}")
+            self.failures.append(f"page {page} of {params.get('employer_id')}: {err}")
+            return []
 
+    def _iter_pages(self, params: dict[str, Any], first_page: dict[str, Any] = None) -> Iterator[list[dict]]:
+        """Yields the first page, then the remaining pages in completion order as they are fetched concurrently."""
+        if first_page is None:
+            first_page = self._get_page(params, 0)
+        yield first_page["items"]
+        pages = min(first_page.get("pages", 1), HHApiConnector._max_pages)
+        if pages > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                futures = [executor.submit(self._get_page_items, params, page) for page in range(1, pages)]
+                for future in as_completed(futures):
+                    yield future.result()
 
+    def _get_pages(self, params: dict[str, Any], first_page: dict[str, Any] = None) -> list[dict]:
+        """Reads number of pages from the first page and fetches the remaining pages concurrently."""
+        return [vacancy for items in self._iter_pages(params, first_page) for vacancy in items]
 
+    def iter_pages(self) -> Iterator[list[dict]]:
+        """Yields pages of vacancies as they arrive; raises CrawlIncomplete at the end if pages were skipped."""
+        self.failures = []
+        yield from self._iter_pages(self._build_params())
+        if self.failures:
+            raise CrawlIncomplete(self.failures)
 
+    def _get_data(self) -> list[dict]:
+        """Extract data using specified parameters."""
+        self.vacancies.extend(self._get_pages(self._build_params()))
+        return self.vacancies
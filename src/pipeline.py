@@ -0,0 +1,105 @@
+"""
+Module for streaming vacancies from API pages through parsing into the database.
+"""
+
+import queue
+import threading
+from typing import Iterator
+from src.databasemanager import BATCH_SIZE, DataBaseConnector
+from src.metrics import metrics
+from src.parser import BaseApiConnector, log_error, published_at
+from src.resilience import CrawlIncomplete
+from src.vacancy import BaseVacancy
+
+_PAGES_DONE = object()
+
+
+class Pipeline:
+    """Streaming pipeline: fetch stage runs in background thread, parse and load stages consume its pages."""
+
+    def __init__(self, api_connector: BaseApiConnector, vacancy: BaseVacancy, database_name: str, params: dict,
+                 batch_size: int = BATCH_SIZE, queue_size: int = 4):
+        self.api_connector = api_connector
+        self.vacancy = vacancy
+        self.database_name = database_name
+        self.params = params
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.failures: list[str] = []
+        self._newest = None
+        self._error = None
+
+    def _fetch(self, pages: queue.Queue, stop: threading.Event):
+        """Puts fetched pages into the bounded queue, blocking while loading stage is behind."""
+        try:
+            with metrics.timer("stage_seconds", stage="pipeline.fetch"):
+                for items in metrics.profile_iter("pipeline.fetch", self.api_connector.iter_pages()):
+                    while not stop.is_set():
+                        try:
+                            pages.put(items, timeout=0.5)
+                            break
+                        except queue.Full:
+                            metrics.inc("pipeline_backpressure_waits_total")
+                            continue
+                    if stop.is_set():
+                        return
+        except Exception as err:
+            self._error = err
+        finally:
+            pages.put(_PAGES_DONE)
+
+    def _pages(self) -> Iterator[list[dict]]:
+        """Yields pages from the fetch stage, tracking the newest publication date."""
+        pages = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        fetcher = threading.Thread(target=self._fetch, args=(pages, stop), daemon=True)
+        fetcher.start()
+        try:
+            while (items := pages.get()) is not _PAGES_DONE:
+                if items:
+                    newest = max(items, key=published_at)
+                    if self._newest is None or published_at(newest) > published_at(self._newest):
+                        self._newest = newest
+                yield items
+        finally:
+            stop.set()
+            while fetcher.is_alive():
+                try:
+                    pages.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+        if isinstance(self._error, CrawlIncomplete):
+            # Pages that did arrive are still loaded; run() skips deactivation and keeps the watermark.
+            self.failures = self._error.failures
+            metrics.inc("pipeline_incomplete_crawls_total")
+            log_error(f"Crawl is incomplete: {self._error}")
+        elif self._error is not None:
+            raise self._error
+
+    def _batches(self) -> Iterator[list]:
+        """Regroups parsed pages into batches of batch_size vacancies."""
+        batch = []
+        for vacancies in metrics.profile_iter("pipeline.parse", self.vacancy.iter_vacancies(self._pages())):
+            batch.extend(vacancies)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self, deactivate_missing: bool = False) -> int:
+        """Runs the pipeline in a single database transaction and returns number of loaded vacancies.
+
+        When some pages or shards failed, fetched vacancies are loaded but missing ones are not deactivated
+        and the incremental watermark stays in place, so the gap is fetched again by the next sync;
+        the failures are left in `failures`.
+        """
+        self.failures = []
+        self._newest = None
+        self._error = None
+        with metrics.profile("pipeline.load"):
+            rows = DataBaseConnector.load_stream(self._batches(), self.database_name, self.params, self.batch_size,
+                                                 lambda: deactivate_missing and not self.failures)
+        if self._newest is not None and not self.failures:
+            self.api_connector.update_watermark([self._newest])
+        return rows
@@ -0,0 +1,138 @@
+"""
+Module for caching data manager query results between loads.
+"""
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain, islice
+from typing import Any, Iterator
+from src.databasemanager import BaseDataManager, DataBaseManager
+
+
+class CachedDataManager(BaseDataManager):
+    """LRU/TTL cache over DataBaseManager invalidated when a load commits a new load generation.
+
+    The generation is read at most once per `check_interval` seconds, so repeated queries within that interval
+    are served from memory without a database round trip. Results longer than `max_rows` are streamed
+    without caching. With `path` the cache is loaded from a file and saved back on close.
+    """
+
+    def __init__(self, db_manager: DataBaseManager, maxsize: int = 128, ttl: float = 300.0,
+                 check_interval: float = 5.0, path: str = None, max_rows: int = 1000):
+        self.db_manager = db_manager
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.path = path
+        self.max_rows = max_rows
+        self._entries: OrderedDict[tuple, tuple[float, tuple]] = OrderedDict()
+        self._dirty = False
+        self._generation = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self._load_file()
+
+    def cursor(self):
+        return self.db_manager.cursor()
+
+    def _load_file(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as file:
+            self._generation, entries = pickle.load(file)
+        self._entries = OrderedDict(entries)
+
+    def _save_file(self):
+        if not self.path or not self._dirty:
+            return
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "wb") as file:
+            pickle.dump((self._generation, list(self._entries.items())), file)
+        os.replace(temporary_path, self.path)
+        self._dirty = False
+
+    def close(self):
+        """Saves cached results to the file, if the cache has one."""
+        with self._lock:
+            self._save_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _check_generation(self, cursor):
+        """Drops cached results when a newer load has been committed."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        cursor.execute("SELECT generation FROM load_generation")
+        generation, = cursor.fetchone()
+        with self._lock:
+            self._checked_at = now
+            if generation != self._generation:
+                self._entries.clear()
+                self._generation = generation
+                self._dirty = True
+
+    def invalidate(self):
+        """Drops all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self._checked_at = float("-inf")
+            self._dirty = True
+
+    def _cached(self, method: str, cursor, *args, **kwargs) -> Iterator[Any]:
+        """Returns cached rows of the query or runs it and caches materialized rows, if there are few enough."""
+        self._check_generation(cursor)
+        key = (method, args, tuple(sorted(kwargs.items())))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return iter(entry[1])
+        stream = getattr(self.db_manager, method)(cursor, *args, **kwargs)
+        rows = tuple(islice(stream, self.max_rows + 1))
+        if len(rows) > self.max_rows:
+            return chain(rows, stream)
+        with self._lock:
+            self._entries[key] = (time.time(), rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._dirty = True
+        return iter(rows)
+
+    def get_companies_and_vacancies_count(self, cursor, limit=None, after=None):
+        return self._cached("get_companies_and_vacancies_count", cursor, limit=limit, after=after)
+
+    def get_all_vacancies(self, cursor, limit=15, after=None):
+        return self._cached("get_all_vacancies", cursor, limit=limit, after=after)
+
+    def get_avg_salary(self, cursor, limit=15, after=None):
+        return self._cached("get_avg_salary", cursor, limit=limit, after=after)
+
+    def get_vacancies_with_higher_salary(self, cursor, limit=None, after=None):
+        return self._cached("get_vacancies_with_higher_salary", cursor, limit=limit, after=after)
+
+    def get_vacancies_with_keyword(self, cursor, keyword, limit=20, after=None):
+        return self._cached("get_vacancies_with_keyword", cursor, keyword, limit=limit, after=after)
+
+    def get_salary_stats(self, cursor, by="title", limit=15, after=None):
+        return self._cached("get_salary_stats", cursor, by=by, limit=limit, after=after)
+
+    def get_snapshots(self, cursor, limit=15, after=None):
+        return self._cached("get_snapshots", cursor, limit=limit, after=after)
+
+    def get_new_vacancies(self, cursor, since, until=None, limit=None, after=None):
+        return self._cached("get_new_vacancies", cursor, since, until=until, limit=limit, after=after)
+
+    def get_closed_vacancies(self, cursor, since, until=None, limit=None, after=None):
+        return self._cached("get_closed_vacancies", cursor, since, until=until, limit=limit, after=after)
+
+    def get_salary_changes(self, cursor, since, until=None, limit=None, after=None):
+        return self._cached("get_salary_changes", cursor, since, until=until, limit=limit, after=after)
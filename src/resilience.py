@@ -0,0 +1,113 @@
+"""
+Module with primitives that protect API client from throttling and failing upstream.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class RequestFailed(Exception):
+    """Raised when request can not be completed within retry budget."""
+
+
+class CrawlIncomplete(Exception):
+    """Raised after the last page of a crawl when some of its pages or shards could not be fetched."""
+
+    def __init__(self, failures: list[str]):
+        super().__init__(f"{len(failures)} pages or shards of the crawl failed: {'; '.join(failures[:5])}")
+        self.failures = failures
+
+
+class TokenBucket:
+    """Token bucket rate limiter shared across worker threads."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and takes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Circuit breaker that pauses all workers after consecutive failures."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def wait(self):
+        """Blocks while circuit is open; after reset timeout lets requests probe the API again."""
+        while True:
+            with self._lock:
+                if self._opened_at is None:
+                    return
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining <= 0:
+                    self._opened_at = None
+                    self._failures = self.failure_threshold - 1
+                    return
+            time.sleep(remaining)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold and self._opened_at is None:
+                self._opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter and capped number of retries."""
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: str = None) -> float:
+        """Returns seconds to sleep before the next attempt, honoring Retry-After header."""
+        parsed = self._parse_retry_after(retry_after)
+        if parsed is not None:
+            return min(parsed, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @staticmethod
+    def _parse_retry_after(value: str) -> float | None:
+        if not value:
+            return None
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
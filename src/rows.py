@@ -0,0 +1,123 @@
+"""
+Module with typed rows returned by data managers.
+
+Every row exposes `key` - the value to pass as `after` to fetch the next page with keyset pagination.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import NamedTuple
+
+
+class CompanyVacanciesRow(NamedTuple):
+    employer_id: int
+    name: str
+    total_vacancies: int
+
+    @property
+    def key(self) -> tuple:
+        return self.total_vacancies, self.employer_id
+
+
+class VacancyRow(NamedTuple):
+    vacancy_id: int
+    employer_name: str
+    name: str
+    top_salary: int
+    link: str
+
+    @property
+    def key(self) -> tuple:
+        return self.top_salary, self.vacancy_id
+
+
+class AverageSalaryRow(NamedTuple):
+    name: str
+    currency: str
+    avg_salary: Decimal
+
+    @property
+    def key(self) -> tuple:
+        return self.avg_salary, self.name, self.currency
+
+
+class VacancyDetailsRow(NamedTuple):
+    vacancy_id: int
+    employer_id: int
+    name: str
+    link: str
+    bottom_salary: int | None
+    top_salary: int | None
+    currency: str | None
+    gross: bool | None
+    responsibilities: str | None
+    requirements: str | None
+    top_salary_net: Decimal
+
+    @property
+    def key(self) -> tuple:
+        return self.top_salary_net, self.vacancy_id
+
+
+class KeywordVacancyRow(NamedTuple):
+    vacancy_id: int
+    name: str
+    link: str
+    responsibilities: str | None
+    requirements: str | None
+    rank: float
+
+    @property
+    def key(self) -> tuple:
+        return self.rank, self.vacancy_id
+
+
+class SalaryStatsRow(NamedTuple):
+    group_name: str
+    total_vacancies: int
+    mean: Decimal
+    median: Decimal
+    p25: Decimal
+    p75: Decimal
+    p90: Decimal
+
+    @property
+    def key(self) -> tuple:
+        return self.median, self.group_name
+
+
+class SnapshotRow(NamedTuple):
+    snapshot_id: int
+    taken_at: datetime
+    vacancies: int
+
+    @property
+    def key(self) -> tuple:
+        return (self.snapshot_id,)
+
+
+class HistoryVacancyRow(NamedTuple):
+    vacancy_id: int
+    employer_id: int | None
+    name: str
+    link: str
+    bottom_salary_net: Decimal | None
+    top_salary_net: Decimal | None
+
+    @property
+    def key(self) -> tuple:
+        return (self.vacancy_id,)
+
+
+class SalaryChangeRow(NamedTuple):
+    vacancy_id: int
+    name: str
+    link: str
+    old_bottom_salary_net: Decimal | None
+    old_top_salary_net: Decimal | None
+    bottom_salary_net: Decimal | None
+    top_salary_net: Decimal | None
+
+    @property
+    def key(self) -> tuple:
+        return (self.vacancy_id,)
@@ -0,0 +1,48 @@
+"""
+Module for normalizing salaries to a single currency net of income tax.
+"""
+
+from configparser import NoSectionError
+from config import config
+from src.vacancy import VacancyRecord
+
+BASE_CURRENCY = "RUR"
+NET_RATIO = 0.87
+
+
+def load_rates(filename: str = "database.ini", section: str = "currency_rates") -> dict[str, float]:
+    """Returns rates of currencies to the base currency from the local config file."""
+    try:
+        rates = {currency.upper(): float(rate) for currency, rate in config(filename, section).items()}
+    except NoSectionError:
+        rates = {}
+    rates.setdefault(BASE_CURRENCY, 1.0)
+    return rates
+
+
+class SalaryNormalizer:
+    """Class for converting salaries to the base currency net of income tax; missing values stay None."""
+
+    def __init__(self, rates: dict[str, float], net_ratio: float = NET_RATIO):
+        self.rates = rates
+        self.net_ratio = net_ratio
+
+    def _convert(self, value: int | None, rate: float | None, gross: bool | None) -> float | None:
+        if value is None or rate is None:
+            return None
+        converted = value * rate
+        if gross:
+            converted *= self.net_ratio
+        return round(converted, 2)
+
+    def normalize(self, record: VacancyRecord) -> VacancyRecord:
+        """Returns record with filled normalized salary fields."""
+        if record.bottom_salary is None and record.top_salary is None:
+            return record
+        rate = self.rates.get(record.currency)
+        return record._replace(bottom_salary_net=self._convert(record.bottom_salary, rate, record.gross),
+                               top_salary_net=self._convert(record.top_salary, rate, record.gross))
+
+    def normalize_page(self, records: list[VacancyRecord]) -> list[VacancyRecord]:
+        """Normalizes salaries of the page of records."""
+        return [self.normalize(record) for record in records]
@@ -0,0 +1,176 @@
+"""
+Module with database schema migrations applied on every start and partition maintenance of vacancy history.
+"""
+
+from datetime import datetime, timezone
+from psycopg2 import sql
+
+MIGRATIONS: list[tuple[int, list[str]]] = [
+    (1, ["""CREATE TABLE IF NOT EXISTS employers (
+            id INT PRIMARY KEY,
+            name VARCHAR(100),
+            link VARCHAR(100),
+            address VARCHAR(100)
+            )""",
+         """CREATE TABLE IF NOT EXISTS vacancies (
+            vacancy_id SERIAL PRIMARY KEY,
+            employer_id INT,
+            name VARCHAR(100),
+            link VARCHAR(100),
+            bottom_salary INT DEFAULT NULL,
+            top_salary INT DEFAULT NULL,
+            currency VARCHAR(10) DEFAULT NULL,
+            gross BOOLEAN DEFAULT NULL,
+            responsibilities TEXT,
+            requirements TEXT,
+            CONSTRAINT fk_employer_id FOREIGN KEY(employer_id) REFERENCES employers(id)
+            )"""]),
+    (2, ["ALTER TABLE vacancies ADD COLUMN hh_vacancy_id BIGINT",
+         "ALTER TABLE vacancies ADD CONSTRAINT uq_vacancies_hh_vacancy_id UNIQUE (hh_vacancy_id)",
+         "ALTER TABLE vacancies ADD COLUMN is_active BOOLEAN NOT NULL DEFAULT TRUE",
+         "ALTER TABLE vacancies ADD COLUMN updated_at TIMESTAMPTZ NOT NULL DEFAULT now()",
+         "ALTER TABLE vacancies ADD COLUMN closed_at TIMESTAMPTZ DEFAULT NULL",
+         "CREATE INDEX idx_vacancies_employer_id ON vacancies (employer_id)",
+         "CREATE INDEX idx_vacancies_active_top_salary ON vacancies (top_salary) WHERE is_active"]),
+    (3, ["CREATE EXTENSION IF NOT EXISTS pg_trgm",
+         """ALTER TABLE vacancies ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(responsibilities, '')), 'B') ||
+            setweight(to_tsvector('russian', coalesce(requirements, '')), 'C')
+            ) STORED""",
+         "CREATE INDEX idx_vacancies_search_vector ON vacancies USING GIN (search_vector)",
+         "CREATE INDEX idx_vacancies_name_trgm ON vacancies USING GIN (name gin_trgm_ops)"]),
+    (4, ["""CREATE MATERIALIZED VIEW employer_vacancy_counts AS
+            SELECT employers.id AS employer_id, employers.name, COUNT(*) AS total_vacancies FROM employers
+            JOIN vacancies ON vacancies.employer_id = employers.id
+            WHERE vacancies.is_active
+            GROUP BY employers.id, employers.name""",
+         "CREATE UNIQUE INDEX idx_employer_vacancy_counts_employer_id ON employer_vacancy_counts (employer_id)",
+         "CREATE INDEX idx_employer_vacancy_counts_total ON employer_vacancy_counts (total_vacancies DESC)",
+         """CREATE MATERIALIZED VIEW salary_stats_by_title AS
+            SELECT name, currency, COUNT(*) AS total_vacancies,
+                   AVG(top_salary)::numeric(10,2) AS avg_salary,
+                   MIN(top_salary) AS min_salary, MAX(top_salary) AS max_salary FROM vacancies
+            WHERE is_active AND top_salary IS NOT NULL
+            GROUP BY name, currency""",
+         "CREATE UNIQUE INDEX idx_salary_stats_by_title_key ON salary_stats_by_title (name, currency)",
+         "CREATE INDEX idx_salary_stats_by_title_avg ON salary_stats_by_title (avg_salary DESC)",
+         """CREATE MATERIALIZED VIEW salary_overall AS
+            SELECT 1 AS id, AVG(top_salary) AS avg_salary, COUNT(top_salary) AS total_vacancies FROM vacancies
+            WHERE is_active""",
+         "CREATE UNIQUE INDEX idx_salary_overall_id ON salary_overall (id)"]),
+    (5, ["ALTER TABLE vacancies ADD COLUMN bottom_salary_net NUMERIC(12,2) DEFAULT NULL",
+         "ALTER TABLE vacancies ADD COLUMN top_salary_net NUMERIC(12,2) DEFAULT NULL",
+         "CREATE INDEX idx_vacancies_active_top_salary_net ON vacancies (top_salary_net) WHERE is_active",
+         "DROP MATERIALIZED VIEW salary_overall",
+         """CREATE MATERIALIZED VIEW salary_overall AS
+            SELECT 1 AS id, AVG(top_salary_net) AS avg_salary, COUNT(top_salary_net) AS total_vacancies
+            FROM vacancies
+            WHERE is_active""",
+         "CREATE UNIQUE INDEX idx_salary_overall_id ON salary_overall (id)"]),
+    (6, ["""CREATE TABLE load_generation (
+            id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+            generation BIGINT NOT NULL DEFAULT 0,
+            loaded_at TIMESTAMPTZ
+            )""",
+         "INSERT INTO load_generation (id, generation) VALUES (1, 0)"]),
+    (7, ["ALTER TABLE employers ALTER COLUMN address TYPE VARCHAR(255)",
+         "ALTER TABLE employers ADD COLUMN site_url VARCHAR(255) DEFAULT NULL",
+         "ALTER TABLE employers ADD COLUMN description TEXT DEFAULT NULL",
+         "ALTER TABLE vacancies ADD COLUMN address VARCHAR(255) DEFAULT NULL",
+         "ALTER TABLE vacancies ADD COLUMN description TEXT DEFAULT NULL",
+         # Until now employers.address held the address of some vacancy of the employer.
+         "UPDATE employers SET address = NULL"]),
+    (8, ["""CREATE TABLE snapshots (
+            snapshot_id BIGSERIAL PRIMARY KEY,
+            taken_at TIMESTAMPTZ NOT NULL,
+            vacancies INT NOT NULL DEFAULT 0
+            )""",
+         "CREATE INDEX idx_snapshots_taken_at ON snapshots (taken_at)",
+         """CREATE TABLE vacancy_history (
+            snapshot_id BIGINT NOT NULL,
+            taken_at TIMESTAMPTZ NOT NULL,
+            hh_vacancy_id BIGINT NOT NULL,
+            employer_id INT,
+            bottom_salary_net NUMERIC(12,2),
+            top_salary_net NUMERIC(12,2),
+            PRIMARY KEY (snapshot_id, hh_vacancy_id, taken_at)
+            ) PARTITION BY RANGE (taken_at)"""]),
+    # Salaries in different currencies and gross or net are compared only after normalization.
+    (9, ["DROP MATERIALIZED VIEW salary_stats_by_title",
+         """CREATE MATERIALIZED VIEW salary_stats_by_title AS
+            SELECT name, 'RUR'::VARCHAR(10) AS currency, COUNT(*) AS total_vacancies,
+                   AVG(top_salary_net)::numeric(12,2) AS avg_salary,
+                   MIN(COALESCE(bottom_salary_net, top_salary_net)) AS min_salary,
+                   MAX(top_salary_net) AS max_salary FROM vacancies
+            WHERE is_active AND top_salary_net IS NOT NULL
+            GROUP BY name""",
+         "CREATE UNIQUE INDEX idx_salary_stats_by_title_key ON salary_stats_by_title (name)",
+         "CREATE INDEX idx_salary_stats_by_title_avg ON salary_stats_by_title (avg_salary DESC)"]),
+    # Rows loaded before migration 2 have no hh.ru id and were duplicated by upserts of the same vacancies:
+    # drop the duplicates and rows that cannot be matched, take the id of the rest from their link.
+    (10, ["""DELETE FROM vacancies AS legacy WHERE hh_vacancy_id IS NULL AND EXISTS (
+             SELECT 1 FROM vacancies
+             WHERE hh_vacancy_id = substring(legacy.link FROM '/vacancy/([0-9]+)')::BIGINT)""",
+          """DELETE FROM vacancies AS legacy USING vacancies AS newer
+             WHERE legacy.hh_vacancy_id IS NULL AND newer.hh_vacancy_id IS NULL
+             AND substring(newer.link FROM '/vacancy/([0-9]+)') = substring(legacy.link FROM '/vacancy/([0-9]+)')
+             AND newer.vacancy_id > legacy.vacancy_id""",
+          "DELETE FROM vacancies WHERE hh_vacancy_id IS NULL AND substring(link FROM '/vacancy/([0-9]+)') IS NULL",
+          """UPDATE vacancies SET hh_vacancy_id = substring(link FROM '/vacancy/([0-9]+)')::BIGINT
+             WHERE hh_vacancy_id IS NULL"""]),
+]
+
+AGGREGATE_VIEWS: tuple[str, ...] = ("employer_vacancy_counts", "salary_stats_by_title", "salary_overall")
+HISTORY_TABLE = "vacancy_history"
+HISTORY_RETENTION_MONTHS = 12
+
+
+def migrate(cursor):
+    """Applies pending migrations in order and records their versions."""
+    cursor.execute("""CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INT PRIMARY KEY,
+                        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                        )""")
+    cursor.execute("SELECT version FROM schema_migrations")
+    applied = {version for version, in cursor.fetchall()}
+    for version, statements in MIGRATIONS:
+        if version in applied:
+            continue
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+        print(f"Migration {version} is applied")
+
+
+def _month_start(moment: datetime, months: int = 0) -> datetime:
+    """Returns start of the UTC month shifted by given number of months."""
+    moment = moment.astimezone(timezone.utc)
+    month = moment.year * 12 + moment.month - 1 + months
+    return datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def ensure_history_partition(cursor, taken_at: datetime):
+    """Creates monthly partitions of vacancy history for the month of taken_at and the next one."""
+    for months in (0, 1):
+        start = _month_start(taken_at, months)
+        cursor.execute(sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM (%s) TO (%s)").format(
+            sql.Identifier(f"{HISTORY_TABLE}_{start:%Y_%m}"), sql.Identifier(HISTORY_TABLE)),
+            (start, _month_start(start, 1)))
+
+
+def drop_expired_history(cursor, now: datetime, retention_months: int = HISTORY_RETENTION_MONTHS) -> list[str]:
+    """Drops monthly partitions and snapshots older than retention and returns names of dropped partitions."""
+    cutoff = _month_start(now, -retention_months)
+    cursor.execute("""SELECT child.relname FROM pg_inherits
+                      JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+                      JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+                      WHERE parent.relname = %s""", (HISTORY_TABLE,))
+    dropped = []
+    for partition, in cursor.fetchall():
+        start = datetime.strptime(partition[-7:], "%Y_%m").replace(tzinfo=timezone.utc)
+        if _month_start(start, 1) <= cutoff:
+            cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(partition)))
+            dropped.append(partition)
+    cursor.execute("DELETE FROM snapshots WHERE taken_at < %s", (cutoff,))
+    return dropped
@@ -0,0 +1,41 @@
+"""
+Module for normalizing snippet text received from hh.ru.
+"""
+
+import html
+import re
+from typing import Any, Iterable
+
+HTML_TAG_PATTERN = re.compile(r"<[^>]*>")
+BLOCK_TAG_PATTERN = re.compile(r"</?(?:p|br|li|ul|ol|div|h[1-6])\b[^>]*>", re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+SNIPPET_FIELDS: tuple[str, ...] = ("requirement", "responsibility")
+
+
+def clean_text(text: str | None) -> str | None:
+    """Removes HTML tags (including <highlighttext>), unescapes entities and collapses whitespace.
+
+    Block tags of full descriptions are replaced with spaces, so that paragraphs are not glued together.
+    """
+    if not text:
+        return None
+    if "<" in text:
+        text = HTML_TAG_PATTERN.sub("", BLOCK_TAG_PATTERN.sub(" ", text))
+    if "&" in text:
+        text = html.unescape(text)
+    return WHITESPACE_PATTERN.sub(" ", text).strip() or None
+
+
+def clean_texts(texts: Iterable[str | None]) -> list[str | None]:
+    """Normalizes batch of texts."""
+    return [clean_text(text) for text in texts]
+
+
+def clean_page(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Normalizes snippet fields of every vacancy on the page in place and returns the page."""
+    for item in items:
+        snippet = item.get("snippet")
+        if snippet:
+            for field in SNIPPET_FIELDS:
+                snippet[field] = clean_text(snippet.get(field))
+    return items
@@ -1,4 +1,87 @@
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, NamedTuple
+import multiprocessing
+import os
+import time
+from src.metrics import metrics
+from src.text import clean_page, clean_text
+
+
+class VacancyRecord(NamedTuple):
+    """Compact row of a vacancy consumed by loaders; missing values are None."""
+    vacancy_id: int
+    employer_id: int | None
+    employer_name: str | None
+    employer_url: str | None
+    name: str | None
+    link: str | None
+    bottom_salary: int | None
+    top_salary: int | None
+    currency: str | None
+    gross: bool | None
+    responsibility: str | None
+    requirement: str | None
+    address: str | None
+    published_at: str | None
+    bottom_salary_net: float | None = None
+    top_salary_net: float | None = None
+    description: str | None = None
+    employer_area: str | None = None
+    employer_site_url: str | None = None
+    employer_description: str | None = None
+
+
+def extract_record(vacancy: dict[str, Any]) -> VacancyRecord:
+    """Extracts VacancyRecord from raw API vacancy with already normalized snippet in a single pass.
+
+    Description and employer profile fields are filled for vacancies passed through enrichment.
+    """
+    employer = vacancy.get("employer") or {}
+    employer_details = vacancy.get("employer_details") or {}
+    salary = vacancy.get("salary") or {}
+    snippet = vacancy.get("snippet") or {}
+    address = vacancy.get("address")
+    employer_id = employer.get("id")
+    return VacancyRecord(
+        vacancy_id=int(vacancy["id"]),
+        employer_id=int(employer_id) if employer_id else None,
+        employer_name=employer.get("name"),
+        employer_url=employer.get("alternate_url"),
+        name=vacancy.get("name"),
+        link=vacancy.get("alternate_url"),
+        bottom_salary=salary.get("from"),
+        top_salary=salary.get("to"),
+        currency=salary.get("currency"),
+        gross=salary.get("gross"),
+        responsibility=snippet.get("responsibility"),
+        requirement=snippet.get("requirement"),
+        address=(f"г. {address.get('city')}, ул. {address.get('street')}, стр. {address.get('building')}"
+                 if address else None),
+        published_at=vacancy.get("published_at"),
+        description=clean_text(vacancy.get("description")),
+        employer_area=(employer_details.get("area") or {}).get("name"),
+        employer_site_url=employer_details.get("site_url") or None,
+        employer_description=clean_text(employer_details.get("description")),
+    )
+
+
+def extract_records(vacancies: list[dict[str, Any]]) -> list[VacancyRecord]:
+    """Normalizes snippet text of the page and extracts its VacancyRecords."""
+    return [extract_record(vacancy) for vacancy in clean_page(vacancies)]
+
+
+def parse_pages(pages: list[list[dict[str, Any]]], salary_normalizer=None) -> tuple[list[list[VacancyRecord]], float]:
+    """Parses chunk of pages in a worker process and returns pages of VacancyRecords with elapsed seconds."""
+    started_at = time.perf_counter()
+    parsed = []
+    for vacancies in pages:
+        records = extract_records(vacancies)
+        if salary_normalizer is not None:
+            records = salary_normalizer.normalize_page(records)
+        parsed.append(records)
+    return parsed, time.perf_counter() - started_at
 
 
 class BaseVacancy(ABC):
@@ -7,35 +90,100 @@ class BaseVacancy(ABC):
     def create_vacancy(self, vacancies: list[dict]):
         pass
 
+    def iter_vacancies(self, pages: Iterable[list[dict]]) -> Iterator[list]:
+        """Lazily transforms pages of raw vacancies into pages of Vacancies."""
+        for page in pages:
+            yield self.create_vacancy(page)
+
 
 class Vacancy(BaseVacancy):
-    """Composite class for creating Vacancy instances"""
-    name: str
-    link: str
-    pay: str
-    description: str
-    employer_info: str
-
-    def __init__(self, name, link, pay, description, employer_info, address):
-        self.employer_info = employer_info
-        self.description = description
-        self.pay = pay
-        self.link = link
-        self.name = name
-        self.address = address
+    """Class for creating compact Vacancy records from raw API data.
 
-    def create_vacancy(self, vacancies: list[dict]):
-        """Returns list of Vacancies."""
-        steps = (self.name.create_entity,
-                 self.link.create_entity,
-                 self.pay.create_entity,
-                 self.employer_info.create_entity,
-                 self.description.create_entity,
-                 self.address.create_entity)
-        return [[step(vacancy) for step in steps] for vacancy in vacancies]
+    With workers > 1 large inputs are parsed in a process pool by chunks of chunk_size pages,
+    inputs smaller than min_parallel_items are parsed serially in the calling process.
+    """
 
-    def __repr__(self):
-        return f"{self.name}. {self.link}. {self.pay}. {self.description}. {self.employer_info}."
+    def __init__(self, salary_normalizer=None, workers: int = 1, chunk_size: int = 20,
+                 min_parallel_items: int = 5000):
+        self.salary_normalizer = salary_normalizer
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_parallel_items = min_parallel_items
+        self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Workers are spawned rather than forked: fetch stage and pools run threads in this process.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _parse_serial(self, vacancies: list[dict]) -> list[VacancyRecord]:
+        started_at = time.perf_counter()
+        records = extract_records(vacancies)
+        if self.salary_normalizer is not None:
+            records = self.salary_normalizer.normalize_page(records)
+        metrics.observe("parse_page_seconds", time.perf_counter() - started_at)
+        metrics.inc("parsed_items_total", len(records))
+        return records
+
+    def _collect(self, future) -> list[list[VacancyRecord]]:
+        parsed, seconds = future.result()
+        metrics.observe("parse_chunk_seconds", seconds)
+        metrics.inc("parsed_items_total", sum(len(records) for records in parsed))
+        return parsed
 
+    def create_vacancy(self, vacancies: list[dict]) -> list[VacancyRecord]:
+        """Returns list of Vacancies with salaries normalized when normalizer is set."""
+        if self.workers <= 1 or len(vacancies) < self.min_parallel_items:
+            return self._parse_serial(vacancies)
+        chunk = max(len(vacancies) // (self.workers * 4), 1)
+        futures = [self._pool().submit(parse_pages, [vacancies[start:start + chunk]], self.salary_normalizer)
+                   for start in range(0, len(vacancies), chunk)]
+        return [record for future in futures for records in self._collect(future) for record in records]
 
+    def iter_vacancies(self, pages: Iterable[list[dict]]) -> Iterator[list[VacancyRecord]]:
+        """Lazily transforms pages of raw vacancies into pages of Vacancies, keeping order of pages.
 
+        Pages are parsed serially until min_parallel_items vacancies are seen, so small inputs never
+        start the process pool; at most two chunks per worker are in flight.
+        """
+        if self.workers <= 1:
+            yield from super().iter_vacancies(pages)
+            return
+        pending = deque()
+        chunk, seen = [], 0
+        try:
+            for page in pages:
+                seen += len(page)
+                if self._executor is None and seen < self.min_parallel_items:
+                    yield self._parse_serial(page)
+                    continue
+                chunk.append(page)
+                if len(chunk) < self.chunk_size:
+                    continue
+                pending.append(self._pool().submit(parse_pages, chunk, self.salary_normalizer))
+                chunk = []
+                while len(pending) >= self.workers * 2:
+                    yield from self._collect(pending.popleft())
+            if chunk:
+                pending.append(self._pool().submit(parse_pages, chunk, self.salary_normalizer))
+            while pending:
+                yield from self._collect(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        """Shuts down the process pool if it was started."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(workers={self.workers})"
@@ -0,0 +1,50 @@
+import pytest
+from src import archive
+from src.archive import ArchiveWriter, ReplayApiConnector
+from src.parser import HHApiConnector
+from src.resilience import TokenBucket
+
+PAGES = [[{"id": "1"}, {"id": "2"}], [{"id": "2"}, {"id": "3"}], [{"id": "1"}]]
+
+
+def write_archive(path: str):
+    with ArchiveWriter(path) as writer:
+        for page, items in enumerate(PAGES):
+            writer.write({"employer_id": "1", "page": page}, {"items": items, "found": 5})
+
+
+def test_replay_yields_archived_pages_deduplicated(tmp_path):
+    path = str(tmp_path / "crawl.ndjson.gz")
+    write_archive(path)
+    pages = list(ReplayApiConnector(path).iter_pages())
+    assert pages == [[{"id": "1"}, {"id": "2"}], [{"id": "3"}]]
+
+
+def test_appended_archive_is_replayed_whole(tmp_path):
+    path = str(tmp_path / "crawl.ndjson.gz")
+    write_archive(path)
+    with ArchiveWriter(path) as writer:
+        writer.write({"page": 3}, {"items": [{"id": "4"}]})
+    assert [item["id"] for item in ReplayApiConnector(path)._get_data()] == ["1", "2", "3", "4"]
+
+
+def test_zstd_archive_is_replayed(tmp_path):
+    pytest.importorskip("zstandard")
+    path = str(tmp_path / "crawl.ndjson.zst")
+    write_archive(path)
+    assert [item["id"] for item in ReplayApiConnector(path)._get_data()] == ["1", "2", "3"]
+
+
+def test_zstd_archive_without_zstandard_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "zstandard", None)
+    with pytest.raises(ImportError, match="archive extra"):
+        ArchiveWriter(str(tmp_path / "crawl.ndjson.zst"))
+
+
+def test_fetched_pages_are_archived_with_their_query(tmp_path):
+    path = str(tmp_path / "crawl.ndjson.gz")
+    with ArchiveWriter(path) as writer:
+        connector = HHApiConnector(archive=writer, rate_limiter=TokenBucket(rate=1000, capacity=1000))
+        connector._request = lambda url, params: {"items": [{"id": str(params["page"])}], "pages": 1}
+        connector._get_page({"text": "Python"}, 0)
+    assert list(ReplayApiConnector(path).iter_pages()) == [[{"id": "0"}]]
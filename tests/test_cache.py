@@ -0,0 +1,120 @@
+import time
+import pytest
+from src import cache as cache_module
+from src.cache import ResponseCache
+from src.parser import HHApiConnector
+
+WATERMARK = "2024-05-01T10:00:00+0300"
+URL = "https://api.hh.ru/vacancies"
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict = None, headers: dict = None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """Session returning prepared responses and recording request headers."""
+
+    def __init__(self, *responses: FakeResponse):
+        self.responses = list(responses)
+        self.headers = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.headers.append(headers)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def cache(tmp_path) -> ResponseCache:
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_cache_key_does_not_depend_on_parameter_order():
+    assert (ResponseCache.make_key(URL, {"text": "Python", "employer_id": ["1", "2"], "page": 0})
+            == ResponseCache.make_key(URL, {"page": 0, "employer_id": ["1", "2"], "text": "Python"}))
+    assert ResponseCache.make_key(URL, {"page": 0}) != ResponseCache.make_key(URL, {"page": 1})
+
+
+def test_stored_response_is_returned_with_validators(cache):
+    cache.set("key", '"etag"', "Wed, 01 May 2024 10:00:00 GMT", {"items": [{"id": "1"}]})
+    assert cache.get("key") == ('"etag"', "Wed, 01 May 2024 10:00:00 GMT", {"items": [{"id": "1"}]})
+    assert cache.get("missing") is None
+
+
+def test_expired_responses_are_evicted(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"), ttl=60)
+    now = time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now - 120)
+    cache.set("old", None, None, {})
+    monkeypatch.setattr(cache_module.time, "time", lambda: now)
+    cache.set("new", None, None, {})
+    assert cache.prune() == 1
+    assert cache.get("old") is None and cache.get("new") is not None
+
+
+def test_least_recently_used_responses_are_evicted_above_max_rows(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"), max_rows=2, prune_every=3)
+    clock = iter(range(1_000_000_000, 1_000_000_100))
+    monkeypatch.setattr(cache_module.time, "time", lambda: next(clock))
+    cache.set("first", None, None, {})
+    cache.set("second", None, None, {})
+    cache.touch("first")
+    # The third write runs eviction: "second" is the least recently used response.
+    cache.set("third", None, None, {})
+    assert [key for key in ("first", "second", "third") if cache.get(key)] == ["first", "third"]
+
+
+def test_not_modified_response_is_served_from_cache(cache):
+    connector = HHApiConnector(cache=cache)
+    connector.session = FakeSession(FakeResponse(200, {"items": [1]}, {"ETag": '"v1"'}), FakeResponse(304))
+    assert connector._conditional_get(URL, {"page": 0}) == {"items": [1]}
+    assert connector._conditional_get(URL, {"page": 0}) == {"items": [1]}
+    assert connector.session.headers == [{}, {"If-None-Match": '"v1"'}]
+
+
+def test_incremental_sync_starts_at_watermark_between_sweeps(cache):
+    connector = HHApiConnector(cache=cache, incremental=True, sweep_interval=3600)
+    cache.set_watermark(connector.watermark_name, WATERMARK)
+    cache.set_watermark(f"{connector.watermark_name}:swept_at", str(time.time() - 60))
+    assert connector._build_params()["date_from"] == WATERMARK
+
+
+def test_incremental_sync_sweeps_whole_period_when_due(cache):
+    connector = HHApiConnector(cache=cache, incremental=True, sweep_interval=3600)
+    cache.set_watermark(connector.watermark_name, WATERMARK)
+    cache.set_watermark(f"{connector.watermark_name}:swept_at", str(time.time() - 7200))
+    assert "date_from" not in connector._build_params()
+    connector.update_watermark([{"published_at": "2024-05-02T10:00:00+0300"}])
+    assert not connector.sweep_due
+    assert connector._build_params()["date_from"] == "2024-05-02T10:00:00+0300"
+
+
+def test_first_incremental_sync_counts_as_sweep(cache):
+    connector = HHApiConnector(cache=cache, incremental=True)
+    assert connector.sweep_due
+    assert "date_from" not in connector._build_params()
+    connector.update_watermark([{"published_at": WATERMARK}])
+    assert not connector.sweep_due
+
+
+def test_sync_without_incremental_ignores_watermark(cache):
+    cache.set_watermark(HHApiConnector(cache=cache).watermark_name, WATERMARK)
+    connector = HHApiConnector(cache=cache)
+    assert "date_from" not in connector._build_params()
+    assert not connector.sweep_due
+
+
+def test_incremental_sync_without_cache_is_rejected():
+    with pytest.raises(ValueError):
+        HHApiConnector(incremental=True)
@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from src.cli import main  # noqa: E402
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["sync", "--incremental"], "--incremental requires --cache"),
+    (["sync", "--incremental", "--cache", "responses.sqlite", "--deactivate-missing"],
+     "--deactivate-missing cannot be used with --incremental"),
+    (["query", "snapshots", "--columnar", "columns"], "--columnar does not support queries snapshots"),
+])
+def test_conflicting_options_are_rejected(capsys, argv, message):
+    with pytest.raises(SystemExit) as error:
+        main(argv)
+    assert error.value.code == 2
+    assert message in capsys.readouterr().err
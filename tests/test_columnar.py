@@ -0,0 +1,115 @@
+import math
+import random
+from decimal import Decimal
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.columnar import ColumnarDataManager, StringColumn, _write_strings, export_records  # noqa: E402
+from src.vacancy import VacancyRecord  # noqa: E402
+
+TITLES = ("Python developer", "Java developer", "QA engineer", None)
+
+
+def percentile_cont(values: list[float], share: float) -> float:
+    """Reference of PostgreSQL percentile_cont: linear interpolation between the closest ranks."""
+    values = sorted(values)
+    position = share * (len(values) - 1)
+    lower, upper = math.floor(position), math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def money(value: float) -> Decimal:
+    return Decimal(f"{value:.2f}")
+
+
+@pytest.fixture(scope="module")
+def records() -> list[VacancyRecord]:
+    generator = random.Random(7)
+    result = []
+    for vacancy_id in range(1, 401):
+        employer_id = generator.choice((None, 1, 2, 3))
+        bottom = generator.choice((None, generator.randrange(50, 200) * 1000))
+        top = generator.choice((None, generator.randrange(200, 400) * 1000))
+        result.append(VacancyRecord(vacancy_id, employer_id, f"Employer {employer_id}" if employer_id else None, None,
+                                    generator.choice(TITLES), f"https://hh.ru/vacancy/{vacancy_id}", bottom, top,
+                                    "RUR" if bottom or top else None, False, None, None, None, None,
+                                    bottom_salary_net=bottom and bottom * 0.87, top_salary_net=top and top * 0.87))
+    return result
+
+
+@pytest.fixture(scope="module")
+def manager(records, tmp_path_factory) -> ColumnarDataManager:
+    directory = str(tmp_path_factory.mktemp("columns"))
+    # The second batch repeats vacancies with changed salaries: later records win.
+    assert export_records([records[:300], records[200:]], directory) == len(records)
+    return ColumnarDataManager(directory)
+
+
+def salaries_by_group(records: list[VacancyRecord], by: str) -> dict[str | None, list[float]]:
+    groups = {}
+    for record in records:
+        bottom, top = record.bottom_salary_net, record.top_salary_net
+        if bottom is None and top is None or by == "employer" and record.employer_id is None:
+            continue
+        salary = ((bottom if bottom is not None else top) + (top if top is not None else bottom)) / 2
+        groups.setdefault(record.name if by == "title" else record.employer_name, []).append(salary)
+    return groups
+
+
+@pytest.mark.parametrize("by", ["title", "employer"])
+def test_salary_stats_match_percentile_cont(manager, records, by):
+    rows = list(manager.get_salary_stats(None, by=by, limit=None))
+    groups = salaries_by_group(records, by)
+    assert {row.group_name for row in rows} == set(groups)
+    for row in rows:
+        values = groups[row.group_name]
+        assert row.total_vacancies == len(values)
+        assert row.mean == money(sum(values) / len(values))
+        assert row.median == money(percentile_cont(values, 0.5))
+        assert row.p25 == money(percentile_cont(values, 0.25))
+        assert row.p75 == money(percentile_cont(values, 0.75))
+        assert row.p90 == money(percentile_cont(values, 0.9))
+    assert [row.median for row in rows] == sorted((row.median for row in rows), reverse=True)
+
+
+def test_avg_salary_averages_normalized_top_salary(manager, records):
+    tops = {}
+    for record in records:
+        if record.top_salary_net is not None:
+            tops.setdefault(record.name, []).append(record.top_salary_net)
+    rows = list(manager.get_avg_salary(None, limit=None))
+    assert {row.name: row.avg_salary for row in rows} == {name: money(sum(values) / len(values))
+                                                          for name, values in tops.items()}
+    assert {row.currency for row in rows} == {"RUR"}
+
+
+@pytest.mark.parametrize("method", ["get_salary_stats", "get_avg_salary", "get_all_vacancies"])
+def test_keyset_pages_match_single_query(manager, method):
+    rows = list(getattr(manager, method)(None, limit=None))
+    pages, after = [], None
+    while page := list(getattr(manager, method)(None, limit=2, after=after)):
+        pages.extend(page)
+        after = page[-1].key
+    assert pages == rows
+
+
+def test_keyword_search_ranks_title_and_snippet_matches(tmp_path):
+    records = [VacancyRecord(1, 1, "Employer", None, "Python developer", None, None, None, None, None,
+                             "Разработка сервисов на PYTHON", "Знание SQL", None, None),
+               VacancyRecord(2, 1, "Employer", None, "QA engineer", None, None, None, None, None,
+                             "Тестирование сервисов", "Опыт с Python и Django", None, None),
+               VacancyRecord(3, 1, "Employer", None, "Аналитик", None, None, None, None, None, None, "SQL, Excel",
+                             None, None)]
+    export_records([records], str(tmp_path))
+    rows = list(ColumnarDataManager(str(tmp_path)).get_vacancies_with_keyword(None, "python сервисов", limit=None))
+    assert [(row.vacancy_id, row.rank) for row in rows] == [(1, pytest.approx(1.8)), (2, pytest.approx(0.6))]
+
+
+def test_text_search_skips_matches_across_rows_and_handles_case(tmp_path):
+    _write_strings(str(tmp_path), "text", ["xa", "AB", None, "İstanbul", "Straße"])
+    found = StringColumn(str(tmp_path), "text").contains(["ab", "aa", "stan", "ß"])
+    assert found.tolist() == [[False, True, False, False, False],
+                              [False, False, False, False, False],
+                              [False, False, False, True, False],
+                              [False, False, False, False, True]]
@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+import pytest
+from src import crawler, parser
+from src.crawler import CrawlPlanner
+from src.parser import HHApiConnector
+from src.resilience import CrawlIncomplete, RequestFailed, TokenBucket
+
+
+def vacancy(vacancy_id: int, employer_id: str, days_ago: float = 1, area: str = "1") -> dict:
+    published = datetime.now() - timedelta(days=days_ago)
+    return {"id": str(vacancy_id), "employer": {"id": employer_id}, "area": {"id": area},
+            "published_at": published.strftime("%Y-%m-%dT%H:%M:%S+0300")}
+
+
+class FakeHHConnector(HHApiConnector):
+    """Connector answering search pages from prepared vacancies, filtered and paginated like hh.ru does."""
+    results_ceiling = 4
+    per_page = 2
+
+    def __init__(self, vacancies: list[dict], employers_id: list[str], errors: dict[tuple, Exception] = None,
+                 **kwargs):
+        super().__init__(employers_id=employers_id, rate_limiter=TokenBucket(rate=1000, capacity=1000), **kwargs)
+        self.all_vacancies = vacancies
+        # Errors by (employer_id, page); page None fails every page of the employer.
+        self.errors = errors or {}
+        self.requests = []
+
+    def _matches(self, item: dict, params: dict) -> bool:
+        published = item["published_at"][:19]
+        return (item["employer"]["id"] == params["employer_id"]
+                and ("area" not in params or item["area"]["id"] in params["area"])
+                and params["date_from"] <= published < params["date_to"])
+
+    def _get_page(self, params: dict, page: int) -> dict:
+        self.requests.append({**params, "page": page})
+        error = self.errors.get((params["employer_id"], page)) or self.errors.get((params["employer_id"], None))
+        if error is not None:
+            raise error
+        found = [item for item in self.all_vacancies if self._matches(item, params)]
+        return {"found": len(found), "pages": max(1, -(-len(found) // self.per_page)),
+                "items": found[page * self.per_page:(page + 1) * self.per_page]}
+
+
+@pytest.fixture(autouse=True)
+def no_error_log(monkeypatch):
+    monkeypatch.setattr(parser, "log_error", lambda message: None)
+    monkeypatch.setattr(crawler, "log_error", lambda message: None)
+
+
+def crawl(planner: CrawlPlanner) -> list[str]:
+    return [item["id"] for items in planner.iter_pages() for item in items]
+
+
+def test_unexpected_shard_error_makes_crawl_incomplete():
+    vacancies = [vacancy(1, "1"), vacancy(2, "2"), vacancy(3, "3")]
+    connector = FakeHHConnector(vacancies, ["1", "2", "3"], errors={("2", None): ValueError("Expecting value")})
+    fetched = []
+    with pytest.raises(CrawlIncomplete) as error:
+        for items in CrawlPlanner(connector).iter_pages():
+            fetched.extend(item["id"] for item in items)
+    assert sorted(fetched) == ["1", "3"]
+    assert error.value.failures == ["shard of employer 2: Expecting value"]
+
+
+def test_areas_filter_the_search():
+    vacancies = [vacancy(1, "1", area="1"), vacancy(2, "1", area="2"), vacancy(3, "1", area="3")]
+    connector = FakeHHConnector(vacancies, ["1"], areas=["1", "2"])
+    assert sorted(crawl(CrawlPlanner(connector))) == ["1", "2"]
+    assert all(request["area"] == ["1", "2"] for request in connector.requests)
+
+
+def test_shards_are_crawled_per_employer_and_deduplicated():
+    # hh.ru may return a vacancy in several shards, e.g. when it is republished during the crawl.
+    vacancies = [vacancy(1, "1"), vacancy(2, "1", days_ago=2), vacancy(3, "2"), vacancy(1, "2", days_ago=3)]
+    connector = FakeHHConnector(vacancies, ["1", "2"])
+    assert sorted(crawl(CrawlPlanner(connector))) == ["1", "2", "3"]
+    assert {request["employer_id"] for request in connector.requests} == {"1", "2"}
+
+
+def test_oversized_shard_is_bisected_by_date():
+    vacancies = [vacancy(index, "1", days_ago=index * 2.5, area=str(index % 3)) for index in range(1, 11)]
+    connector = FakeHHConnector(vacancies, ["1"])
+    assert sorted(crawl(CrawlPlanner(connector)), key=int) == [str(index) for index in range(1, 11)]
+    windows = {(request["date_from"], request["date_to"]) for request in connector.requests}
+    assert len(windows) > 3
+    # Without an area filter the shard keeps covering every area.
+    assert all("area" not in request for request in connector.requests)
+
+
+def test_oversized_shard_is_split_by_filtered_areas_first():
+    vacancies = [vacancy(index, "1", area=str(index % 2 + 1)) for index in range(1, 7)]
+    connector = FakeHHConnector(vacancies, ["1"], areas=["1", "2"])
+    assert sorted(crawl(CrawlPlanner(connector)), key=int) == [str(index) for index in range(1, 7)]
+    assert {tuple(request["area"]) for request in connector.requests} == {("1", "2"), ("1",), ("2",)}
+    assert len({request["date_from"] for request in connector.requests}) == 1
+
+
+def test_window_at_min_width_is_truncated_with_warning():
+    vacancies = [vacancy(index, "1", days_ago=0.5) for index in range(1, 7)]
+    connector = FakeHHConnector(vacancies, ["1"])
+    # The shard is fetched as is; the fake serves all its pages, where hh.ru would stop at the ceiling.
+    assert len(crawl(CrawlPlanner(connector, min_window=timedelta(days=40)))) == 6
+    assert len({request["date_from"] for request in connector.requests}) == 1
+
+
+def test_failed_pages_make_crawl_incomplete():
+    vacancies = [vacancy(index, "1", days_ago=index) for index in range(1, 5)]
+    connector = FakeHHConnector(vacancies, ["1"], errors={("1", 1): RequestFailed("503")})
+    fetched = []
+    with pytest.raises(CrawlIncomplete) as error:
+        for items in CrawlPlanner(connector).iter_pages():
+            fetched.extend(item["id"] for item in items)
+    assert len(fetched) == 2
+    assert error.value.failures == ["page 1 of 1: 503"]
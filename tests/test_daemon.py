@@ -0,0 +1,125 @@
+import json
+import time
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from src import daemon as daemon_module  # noqa: E402
+from src.cache import ResponseCache  # noqa: E402
+from src.daemon import SyncDaemon, Watchlist, load_watchlists  # noqa: E402
+
+
+def watchlist(name: str, interval: float = 60, keyword: str = None, **kwargs) -> Watchlist:
+    return Watchlist(name=name, keyword=keyword, employers=["1"], areas=[], interval=interval, jitter=0, **kwargs)
+
+
+@pytest.fixture
+def make_daemon(tmp_path):
+    def make(*watchlists: Watchlist, **kwargs) -> SyncDaemon:
+        return SyncDaemon(list(watchlists), None, "db", {}, state_path=str(tmp_path / "daemon.json"),
+                          cache=ResponseCache(str(tmp_path / "responses.sqlite")), **kwargs)
+    return make
+
+
+def test_jobs_share_rate_limiter_and_circuit_breaker(make_daemon):
+    daemon = make_daemon(watchlist("python"), watchlist("java"))
+    first, second = (daemon._connector(item).connector for item in daemon.watchlists.values())
+    assert first.rate_limiter is second.rate_limiter is daemon.rate_limiter
+    assert first.circuit_breaker is second.circuit_breaker is daemon.circuit_breaker
+
+
+class FakePipeline:
+    """Pipeline recording runs of watchlists; outcomes are looked up by watchlist keyword."""
+    outcomes: dict = {}
+    runs: list = []
+
+    def __init__(self, connector, vacancy, database_name, params):
+        self.keyword = connector.connector.keyword
+        self.failures = []
+
+    def run(self, deactivate_missing: bool = False) -> int:
+        FakePipeline.runs.append((self.keyword, deactivate_missing))
+        outcome = FakePipeline.outcomes.get(self.keyword, 10)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if outcome == "incomplete":
+            self.failures = ["page 1 of 1: timeout"]
+            return 5
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def pipeline(monkeypatch):
+    monkeypatch.setattr(daemon_module, "Pipeline", FakePipeline)
+    monkeypatch.setattr(FakePipeline, "outcomes", {})
+    monkeypatch.setattr(FakePipeline, "runs", [])
+    return FakePipeline
+
+
+def test_watchlists_are_read_from_config(tmp_path):
+    config_file = tmp_path / "database.ini"
+    config_file.write_text("[postgresql]\nhost = localhost\n"
+                           "[watchlist:python]\nkeyword = Python\nemployers = 1740, 3529\nareas = 1, 2\n"
+                           "interval = 30\nenrich = yes\n"
+                           "[watchlist:java]\nemployers = 80\n", encoding="utf-8")
+    assert load_watchlists(str(config_file)) == [
+        Watchlist("python", "Python", ["1740", "3529"], ["1", "2"], 1800.0, 0.1, True),
+        Watchlist("java", None, ["80"], [], 3600.0, 0.1, False)]
+
+
+def test_watchlist_without_employers_is_rejected(tmp_path):
+    config_file = tmp_path / "database.ini"
+    config_file.write_text("[watchlist:python]\nkeyword = Python\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="no employers"):
+        load_watchlists(str(config_file))
+
+
+def test_run_once_syncs_every_watchlist_without_deactivation(make_daemon, pipeline):
+    pipeline.outcomes = {"Failing": RuntimeError("database is down"), "Partial": "incomplete"}
+    daemon = make_daemon(watchlist("ok", keyword="Ok"), watchlist("failing", keyword="Failing"),
+                         watchlist("partial", keyword="Partial"))
+    daemon.run(once=True)
+    assert sorted(pipeline.runs) == [("Failing", False), ("Ok", False), ("Partial", False)]
+    assert {name: (job["status"], job["failures"], job.get("rows")) for name, job in daemon.state.items()} == {
+        "ok": ("ok", 0, 10), "failing": ("failed", 1, None), "partial": ("incomplete", 1, 5)}
+
+
+def test_next_run_is_scheduled_after_finished_run(make_daemon):
+    daemon = make_daemon(watchlist("python", interval=600))
+    daemon.state = {"python": {}}
+    daemon._run_job("python")
+    job = daemon.state["python"]
+    assert job["next_run"] == pytest.approx(job["finished_at"] + 600)
+    assert daemon._queue == [(job["next_run"], "python")]
+    with open(daemon.state_path, encoding="utf-8") as file:
+        assert json.load(file)["python"]["status"] == "ok"
+
+
+def test_state_is_resumed_after_restart(make_daemon):
+    now = time.time()
+    daemon = make_daemon(watchlist("done"), watchlist("interrupted"), watchlist("new", interval=600))
+    with open(daemon.state_path, "w", encoding="utf-8") as file:
+        json.dump({"done": {"started_at": now - 100, "finished_at": now - 90, "next_run": now + 500},
+                   "interrupted": {"started_at": now - 50, "finished_at": now - 3600, "next_run": now - 60}}, file)
+    daemon._load_state()
+    next_runs = {name: next_run for next_run, name in daemon._queue}
+    assert next_runs["done"] == now + 500
+    assert next_runs["interrupted"] == pytest.approx(now, abs=5)
+    # New watchlists start within a jitter share of their interval, jitter is 0 here.
+    assert next_runs["new"] == pytest.approx(now, abs=5)
+
+
+def test_due_job_is_not_submitted_while_running(make_daemon):
+    daemon = make_daemon(watchlist("python"))
+    daemon.state = {"python": {}}
+    daemon._running.add("python")
+    daemon._queue = [(0, "python")]
+    submitted = []
+
+    class Executor:
+        def submit(self, *args):
+            submitted.append(args)
+
+    assert daemon._submit_due(Executor()) == float("inf")
+    assert submitted == []
+    assert daemon._queue == []
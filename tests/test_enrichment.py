@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import Counter
+import pytest
+from src import enrichment
+from src.cache import DetailCache
+from src.enrichment import Enricher
+from src.parser import BaseApiConnector, HHApiConnector
+from src.resilience import RequestFailed
+
+
+def item(vacancy_id: str, employer_id: str, published_at: str = "2024-05-01T10:00:00+0300") -> dict:
+    return {"id": vacancy_id, "employer": {"id": employer_id}, "published_at": published_at}
+
+
+class FakeSource(BaseApiConnector):
+    def __init__(self, pages: list[list[dict]]):
+        self.pages = pages
+
+    def _get_data(self) -> list[dict]:
+        return [item for page in self.pages for item in page]
+
+    def iter_pages(self):
+        yield from self.pages
+
+
+class FakeDetailsApi(HHApiConnector):
+    """Connector answering detail requests after a short delay and counting them by URL."""
+
+    def __init__(self, failing: set[str] = frozenset()):
+        super().__init__(concurrency=4)
+        self.failing = failing
+        self.requests = Counter()
+        self._requests_lock = threading.Lock()
+
+    def _request(self, url: str, params: dict = None) -> dict:
+        with self._requests_lock:
+            self.requests["/".join(url.rsplit("/", 2)[-2:])] += 1
+        time.sleep(0.01)
+        if url in self.failing:
+            raise RequestFailed(f"Request to {url} failed")
+        record_id = url.rsplit("/", 1)[-1]
+        return {"description": f"About {record_id}", "site_url": f"https://{record_id}.example", "area": None,
+                "name": "ignored"}
+
+
+@pytest.fixture
+def details_cache(tmp_path) -> DetailCache:
+    cache = DetailCache(str(tmp_path / "details.sqlite"))
+    yield cache
+    cache.close()
+
+
+def enrich(pages: list[list[dict]], api: FakeDetailsApi, cache: DetailCache) -> list[dict]:
+    return [vacancy for items in Enricher(FakeSource(pages), api, cache).iter_pages() for vacancy in items]
+
+
+def test_vacancies_get_descriptions_and_employer_profiles(details_cache):
+    vacancies = enrich([[item("1", "10")]], FakeDetailsApi(), details_cache)
+    assert vacancies[0]["description"] == "About 1"
+    assert vacancies[0]["employer_details"] == {"description": "About 10", "site_url": "https://10.example",
+                                                "area": None}
+
+
+def test_shared_employer_is_requested_once(details_cache):
+    api = FakeDetailsApi()
+    pages = [[item("1", "10"), item("2", "10")], [item("3", "10"), item("4", "20")]]
+    vacancies = enrich(pages, api, details_cache)
+    assert all("employer_details" in vacancy for vacancy in vacancies)
+    assert api.requests["employers/10"] == 1
+    assert api.requests["employers/20"] == 1
+
+
+def test_cached_details_are_reused_until_vacancy_is_republished(details_cache):
+    api = FakeDetailsApi()
+    enrich([[item("1", "10")]], api, details_cache)
+    enrich([[item("1", "10")]], api, details_cache)
+    assert api.requests == {"vacancies/1": 1, "employers/10": 1}
+    enrich([[item("1", "10", published_at="2024-05-03T10:00:00+0300")]], api, details_cache)
+    assert api.requests == {"vacancies/1": 2, "employers/10": 1}
+
+
+def test_failed_details_are_skipped(details_cache, monkeypatch):
+    monkeypatch.setattr(enrichment, "log_error", lambda message: None)
+    api = FakeDetailsApi(failing={"https://api.hh.ru/vacancies/1"})
+    vacancies = enrich([[item("1", "10"), item("2", "10")]], api, details_cache)
+    assert "description" not in vacancies[0]
+    assert vacancies[1]["description"] == "About 2"
+    assert vacancies[0]["employer_details"]["description"] == "About 10"
@@ -0,0 +1,52 @@
+from decimal import Decimal
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from src.databasemanager import DataBaseManager  # noqa: E402
+from src.rows import AverageSalaryRow  # noqa: E402
+
+
+@pytest.fixture
+def captured(monkeypatch) -> list[tuple[str, dict]]:
+    """Captures query text and parameters instead of running them."""
+    queries = []
+
+    def iter_rows(self, cursor, method, query, params, row_type):
+        queries.append((" ".join(query.split()), params))
+        return iter(())
+
+    monkeypatch.setattr(DataBaseManager, "_iter_rows", iter_rows)
+    return queries
+
+
+def test_first_page_has_no_keyset_condition():
+    assert DataBaseManager._after("median, COALESCE(group_name, '')", None) == ""
+    assert DataBaseManager._keyset(None) is None
+
+
+def test_keyset_replaces_null_text_keys():
+    assert DataBaseManager._keyset((Decimal("100.00"), None, "RUR")) == (Decimal("100.00"), "", "RUR")
+
+
+def test_avg_salary_compares_and_orders_nullable_keys_with_coalesce(captured):
+    DataBaseManager("db", {}).get_avg_salary(None, limit=2, after=AverageSalaryRow(None, None, Decimal("5")).key)
+    query, params = captured[0]
+    assert "(avg_salary, COALESCE(name, ''), COALESCE(currency, '')) < %(after)s" in query
+    assert "ORDER BY avg_salary DESC, COALESCE(name, '') DESC, COALESCE(currency, '') DESC" in query
+    assert params["after"] == (Decimal("5"), "", "")
+
+
+def test_salary_stats_compares_and_orders_group_with_coalesce(captured):
+    DataBaseManager("db", {}).get_salary_stats(None, after=(Decimal("10"), None))
+    query, params = captured[0]
+    assert "(median, COALESCE(group_name, '')) < %(after)s" in query
+    assert "ORDER BY median DESC, COALESCE(group_name, '') DESC" in query
+    assert params["after"] == (Decimal("10"), "")
+
+
+def test_keyword_rank_is_double_precision(captured):
+    DataBaseManager("db", {}).get_vacancies_with_keyword(None, "python", after=(0.0607927, 10))
+    query, params = captured[0]
+    assert "ts_rank(search_vector, query)::float8 AS rank" in query
+    assert params["after"] == (0.0607927, 10)
@@ -0,0 +1,144 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from src import databasemanager, parser, pipeline  # noqa: E402
+from src.parser import BaseApiConnector  # noqa: E402
+from src.pipeline import Pipeline  # noqa: E402
+from src.resilience import CrawlIncomplete  # noqa: E402
+from src.vacancy import BaseVacancy  # noqa: E402
+
+
+def item(vacancy_id: int, day: int = 1) -> dict:
+    return {"id": str(vacancy_id), "published_at": f"2024-05-{day:02d}T10:00:00+0300"}
+
+
+class FakeConnector(BaseApiConnector):
+    """Connector yielding prepared pages and then raising the error, if it is given."""
+
+    def __init__(self, pages: list[list[dict]], error: Exception = None):
+        self.pages = pages
+        self.error = error
+        self.yielded = 0
+        self.closed = threading.Event()
+        self.watermarks = []
+
+    def _get_data(self) -> list[dict]:
+        return [item for page in self.pages for item in page]
+
+    def iter_pages(self):
+        try:
+            for page in self.pages:
+                self.yielded += 1
+                yield page
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.closed.set()
+
+    def update_watermark(self, vacancies):
+        self.watermarks.append(list(vacancies))
+
+
+class PassThroughVacancy(BaseVacancy):
+    def create_vacancy(self, vacancies: list[dict]) -> list[dict]:
+        return vacancies
+
+
+@pytest.fixture
+def loads(monkeypatch) -> list[dict]:
+    """Replaces the database load with one that consumes batches and records the outcome."""
+    recorded = []
+
+    def load_stream(batches, database_name, params, batch_size, deactivate_missing):
+        rows = sum(len(batch) for batch in batches)
+        recorded.append({"rows": rows, "deactivate_missing": deactivate_missing()})
+        return rows
+
+    monkeypatch.setattr(pipeline.DataBaseConnector, "load_stream", staticmethod(load_stream))
+    monkeypatch.setattr(pipeline, "log_error", lambda message: None)
+    monkeypatch.setattr(parser, "log_error", lambda message: None)
+    return recorded
+
+
+def run(connector: FakeConnector, deactivate_missing: bool = True, **kwargs) -> Pipeline:
+    runner = Pipeline(connector, PassThroughVacancy(), "db", {}, batch_size=3, **kwargs)
+    runner.rows = runner.run(deactivate_missing=deactivate_missing)
+    return runner
+
+
+def test_complete_crawl_deactivates_and_moves_watermark(loads):
+    connector = FakeConnector([[item(1, 3), item(2, 5)], [item(3, 4)], [], [item(4, 1)]])
+    runner = run(connector)
+    assert runner.rows == 4
+    assert loads == [{"rows": 4, "deactivate_missing": True}]
+    assert connector.watermarks == [[item(2, 5)]]
+    assert runner.failures == []
+
+
+def test_incomplete_crawl_loads_pages_but_skips_deactivation_and_watermark(loads):
+    connector = FakeConnector([[item(1)], [item(2)]], CrawlIncomplete(["shard of employer 1: timeout"]))
+    runner = run(connector)
+    assert loads == [{"rows": 2, "deactivate_missing": False}]
+    assert connector.watermarks == []
+    assert runner.failures == ["shard of employer 1: timeout"]
+
+
+def test_fetch_error_is_raised_in_calling_thread(loads):
+    connector = FakeConnector([[item(1)]], RuntimeError("boom"))
+    with pytest.raises(RuntimeError, match="boom"):
+        run(connector)
+    assert connector.watermarks == []
+
+
+def test_failed_load_stops_fetch_thread(monkeypatch, loads):
+    def failing_load(batches, *args):
+        next(iter(batches))
+        raise RuntimeError("load failed")
+
+    monkeypatch.setattr(pipeline.DataBaseConnector, "load_stream", staticmethod(failing_load))
+    threads = threading.active_count()
+    connector = FakeConnector([[item(index)] * 3 for index in range(1000)])
+    with pytest.raises(RuntimeError, match="load failed"):
+        run(connector, queue_size=2)
+    assert connector.closed.wait(5)
+    # The fetch thread stops at the bounded queue instead of draining the whole crawl.
+    assert connector.yielded < 1000
+    deadline = time.monotonic() + 5
+    while threading.active_count() > threads and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert threading.active_count() == threads
+
+
+def test_load_lock_is_taken_after_first_batch(monkeypatch):
+    events = []
+
+    class FakeCursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def execute(self, query, params=None):
+            events.append("lock" if "pg_advisory_xact_lock" in query else query)
+
+    class FakePool:
+        def cursor(self):
+            return FakeCursor()
+
+    def batches():
+        events.append("first batch")
+        yield [1]
+        events.append("second batch")
+        yield [2]
+
+    monkeypatch.setattr(databasemanager.ConnectionPool, "get", lambda *args: FakePool())
+    connector = databasemanager.DataBaseConnector
+    monkeypatch.setattr(connector, "_upsert_employers", staticmethod(lambda *args: 0))
+    monkeypatch.setattr(connector, "_upsert_vacancies", staticmethod(lambda *args: 1))
+    monkeypatch.setattr(connector, "_finish_load", staticmethod(lambda *args: events.append("finish")))
+    assert connector.load_stream(batches(), "db", {}) == 2
+    assert events == ["first batch", "lock", "second batch", "finish"]
@@ -0,0 +1,112 @@
+from decimal import Decimal
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from src.querycache import CachedDataManager  # noqa: E402
+from src.rows import AverageSalaryRow  # noqa: E402
+
+
+class FakeCursor:
+    """Cursor answering the load generation query."""
+
+    def __init__(self, generation: int = 1):
+        self.generation = generation
+
+    def execute(self, query, params=None):
+        assert query == "SELECT generation FROM load_generation"
+
+    def fetchone(self):
+        return (self.generation,)
+
+
+class FakeDataManager:
+    """Data manager returning prepared rows and counting queries."""
+
+    def __init__(self, rows: int = 3):
+        self.rows = [AverageSalaryRow(f"Title {index}", "RUR", Decimal(index)) for index in range(rows)]
+        self.queries = 0
+
+    def get_avg_salary(self, cursor, limit=15, after=None):
+        self.queries += 1
+        return iter(self.rows[:limit])
+
+
+def test_repeated_query_is_served_from_cache():
+    db_manager, cursor = FakeDataManager(), FakeCursor()
+    cached = CachedDataManager(db_manager, check_interval=0)
+    assert list(cached.get_avg_salary(cursor)) == list(cached.get_avg_salary(cursor)) == db_manager.rows
+    assert db_manager.queries == 1
+    list(cached.get_avg_salary(cursor, limit=2))
+    assert db_manager.queries == 2
+
+
+def test_new_load_generation_invalidates_cache():
+    db_manager, cursor = FakeDataManager(), FakeCursor()
+    cached = CachedDataManager(db_manager, check_interval=0)
+    list(cached.get_avg_salary(cursor))
+    cursor.generation = 2
+    list(cached.get_avg_salary(cursor))
+    assert db_manager.queries == 2
+
+
+def test_generation_is_checked_once_per_interval():
+    db_manager, cursor = FakeDataManager(), FakeCursor()
+    cached = CachedDataManager(db_manager, check_interval=60)
+    list(cached.get_avg_salary(cursor))
+    cursor.generation = 2
+    list(cached.get_avg_salary(cursor))
+    assert db_manager.queries == 1
+    cached.invalidate()
+    list(cached.get_avg_salary(cursor))
+    assert db_manager.queries == 2
+
+
+def test_expired_results_are_queried_again():
+    db_manager, cursor = FakeDataManager(), FakeCursor()
+    cached = CachedDataManager(db_manager, ttl=0, check_interval=0)
+    list(cached.get_avg_salary(cursor))
+    list(cached.get_avg_salary(cursor))
+    assert db_manager.queries == 2
+
+
+def test_long_results_are_streamed_without_caching():
+    db_manager, cursor = FakeDataManager(rows=5), FakeCursor()
+    cached = CachedDataManager(db_manager, check_interval=0, max_rows=3)
+    assert list(cached.get_avg_salary(cursor)) == db_manager.rows
+    assert list(cached.get_avg_salary(cursor, limit=3)) == db_manager.rows[:3]
+    list(cached.get_avg_salary(cursor))
+    list(cached.get_avg_salary(cursor, limit=3))
+    assert db_manager.queries == 3
+
+
+def test_least_recently_used_results_are_evicted():
+    db_manager, cursor = FakeDataManager(), FakeCursor()
+    cached = CachedDataManager(db_manager, maxsize=2, check_interval=0)
+    for limit in (1, 2, 1, 3, 1):
+        list(cached.get_avg_salary(cursor, limit=limit))
+    # limit=2 was evicted by limit=3, limit=1 stayed as the most recently used.
+    assert db_manager.queries == 3
+    list(cached.get_avg_salary(cursor, limit=2))
+    assert db_manager.queries == 4
+
+
+def test_cache_file_is_saved_on_close_and_loaded(tmp_path):
+    path = tmp_path / "queries.pickle"
+    db_manager, cursor = FakeDataManager(), FakeCursor()
+    with CachedDataManager(db_manager, check_interval=0, path=str(path)) as cached:
+        list(cached.get_avg_salary(cursor))
+    assert path.exists()
+    reopened = CachedDataManager(db_manager, check_interval=0, path=str(path))
+    assert list(reopened.get_avg_salary(cursor)) == db_manager.rows
+    assert db_manager.queries == 1
+    # A file with another load generation is not served.
+    cursor.generation = 2
+    list(reopened.get_avg_salary(cursor))
+    assert db_manager.queries == 2
+
+
+def test_unchanged_cache_is_not_written(tmp_path):
+    path = tmp_path / "queries.pickle"
+    CachedDataManager(FakeDataManager(), path=str(path)).close()
+    assert not path.exists()
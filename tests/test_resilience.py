@@ -0,0 +1,136 @@
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import pytest
+from requests.exceptions import ConnectionError, HTTPError
+from src import parser
+from src.parser import HHApiConnector
+from src.resilience import CircuitBreaker, RequestFailed, RetryPolicy, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict = None, headers: dict = None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f"{self.status_code} Error", response=self)
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """Session returning prepared responses or raising prepared errors in order."""
+
+    def __init__(self, outcomes: list):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def no_error_log(monkeypatch):
+    monkeypatch.setattr(parser, "log_error", lambda message: None)
+
+
+@pytest.fixture
+def sleeps(monkeypatch) -> list[float]:
+    slept = []
+    monkeypatch.setattr(parser.time, "sleep", slept.append)
+    return slept
+
+
+def make_connector(outcomes: list, max_retries: int = 3, failure_threshold: int = 100) -> HHApiConnector:
+    connector = HHApiConnector(rate_limiter=TokenBucket(rate=1000, capacity=1000),
+                               retry_policy=RetryPolicy(max_retries=max_retries, base_delay=0.1, max_delay=1.0),
+                               circuit_breaker=CircuitBreaker(failure_threshold=failure_threshold))
+    connector.session = FakeSession(outcomes)
+    return connector
+
+
+def test_retry_delay_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0)
+    for attempt in range(10):
+        assert 0 <= policy.delay(attempt) <= min(4.0, 0.5 * 2 ** attempt)
+
+
+def test_retry_delay_honors_retry_after():
+    policy = RetryPolicy(max_delay=30.0)
+    assert policy.delay(0, "7") == 7.0
+    assert policy.delay(0, "120") == 30.0
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=10)
+    assert 8 <= policy.delay(0, format_datetime(retry_at, usegmt=True)) <= 10
+    assert 0 <= policy.delay(0, "not a date") <= 0.5
+
+
+def test_circuit_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+
+
+def test_circuit_breaker_lets_probe_through_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.record_failure()
+    started_at = time.monotonic()
+    breaker.wait()
+    assert time.monotonic() - started_at >= 0.04
+    assert not breaker.is_open
+    # A failed probe opens the circuit again at once.
+    breaker.record_failure()
+    assert breaker.is_open
+
+
+def test_token_bucket_allows_burst_up_to_capacity():
+    bucket = TokenBucket(rate=1, capacity=5)
+    started_at = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - started_at < 0.5
+
+
+def test_request_retries_retryable_statuses(sleeps):
+    connector = make_connector([FakeResponse(503), ConnectionError("reset"),
+                                FakeResponse(429, headers={"Retry-After": "2"}), FakeResponse(200, {"items": []})])
+    assert connector._request("https://api.hh.ru/vacancies") == {"items": []}
+    assert connector.session.calls == 4
+    assert len(sleeps) == 3
+    assert sleeps[2] == 1.0  # Retry-After capped by max_delay
+
+
+def test_request_fails_after_retry_budget(sleeps):
+    connector = make_connector([FakeResponse(502)] * 4, max_retries=3)
+    with pytest.raises(RequestFailed):
+        connector._request("https://api.hh.ru/vacancies")
+    assert connector.session.calls == 4
+    assert len(sleeps) == 3
+
+
+def test_request_does_not_retry_client_errors(sleeps):
+    connector = make_connector([FakeResponse(404)])
+    with pytest.raises(RequestFailed):
+        connector._request("https://api.hh.ru/vacancies")
+    assert connector.session.calls == 1
+    assert sleeps == []
+
+
+def test_request_records_failures_in_circuit_breaker(sleeps):
+    connector = make_connector([FakeResponse(500)] * 2, max_retries=1, failure_threshold=2)
+    with pytest.raises(RequestFailed):
+        connector._request("https://api.hh.ru/vacancies")
+    assert connector.circuit_breaker.is_open
@@ -0,0 +1,57 @@
+import pytest
+from src.salary import BASE_CURRENCY, NET_RATIO, SalaryNormalizer, load_rates
+from src.vacancy import VacancyRecord
+
+
+def record(bottom: int = None, top: int = None, currency: str = None, gross: bool = None) -> VacancyRecord:
+    return VacancyRecord(1, 2, "Employer", None, "Python developer", None, bottom, top, currency, gross,
+                         None, None, None, None)
+
+
+@pytest.fixture
+def normalizer() -> SalaryNormalizer:
+    return SalaryNormalizer({"RUR": 1.0, "USD": 90.0})
+
+
+def test_net_salary_in_base_currency_is_kept(normalizer):
+    normalized = normalizer.normalize(record(100_000, 150_000, "RUR", gross=False))
+    assert (normalized.bottom_salary_net, normalized.top_salary_net) == (100_000, 150_000)
+
+
+def test_gross_salary_is_converted_and_taxed(normalizer):
+    normalized = normalizer.normalize(record(1000, 2000, "USD", gross=True))
+    assert normalized.bottom_salary_net == pytest.approx(1000 * 90 * NET_RATIO)
+    assert normalized.top_salary_net == pytest.approx(2000 * 90 * NET_RATIO)
+    assert (normalized.bottom_salary, normalized.top_salary, normalized.currency) == (1000, 2000, "USD")
+
+
+def test_unknown_gross_is_treated_as_net(normalizer):
+    assert normalizer.normalize(record(top=1000, currency="USD")).top_salary_net == 90_000
+
+
+def test_missing_bound_stays_missing(normalizer):
+    normalized = normalizer.normalize(record(bottom=50_000, currency="RUR", gross=True))
+    assert normalized.bottom_salary_net == pytest.approx(50_000 * NET_RATIO)
+    assert normalized.top_salary_net is None
+
+
+def test_currency_without_rate_is_not_normalized(normalizer):
+    normalized = normalizer.normalize(record(100, 200, "KZT"))
+    assert (normalized.bottom_salary_net, normalized.top_salary_net) == (None, None)
+
+
+def test_vacancy_without_salary_is_returned_as_is(normalizer):
+    original = record()
+    assert normalizer.normalize(original) is original
+
+
+def test_rates_are_read_from_config(tmp_path):
+    config_file = tmp_path / "database.ini"
+    config_file.write_text("[currency_rates]\nusd = 90.5\neur = 98\n", encoding="utf-8")
+    assert load_rates(str(config_file)) == {"USD": 90.5, "EUR": 98.0, BASE_CURRENCY: 1.0}
+
+
+def test_rates_default_to_base_currency_without_section(tmp_path):
+    config_file = tmp_path / "database.ini"
+    config_file.write_text("[postgresql]\nhost = localhost\n", encoding="utf-8")
+    assert load_rates(str(config_file)) == {BASE_CURRENCY: 1.0}